@@ -0,0 +1,183 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+import hashlib #To name the baselines after their contents.
+import json #To store the baselines.
+import os #To find the stored baselines.
+import threading #Prints may be loaded from the training thread.
+import UM.Logger
+import UM.Resources #To find the data directory.
+
+from . import ExtruderSettings #The settings that are stored relative to the baselines.
+
+class Baselines:
+	"""
+	Keeps the baseline settings that the settings of prints are stored
+	relative to.
+
+	Each printer type has a current baseline, which is the full settings of
+	the first print made with it. New prints on that printer only store how
+	they differ from it. If a print differs too much from the current baseline
+	(for instance after an update of Cura added many settings), it becomes
+	the new baseline of that printer.
+
+	Baselines are named after the hash of their contents and never change, so
+	prints that refer to an older baseline can always be read. Each baseline
+	is a JSON file in a directory, and is loaded when it's first needed.
+	"""
+
+	rebase_ratio = 0.5 #If a print differs from the baseline in more than this fraction of the settings, it becomes the new baseline.
+
+	inst = None
+
+	@staticmethod
+	def get_instance():
+		"""
+		Get an instance of this class.
+
+		This implements the singleton pattern.
+		:return: An instance of this class.
+		"""
+		if Baselines.inst is None:
+			Baselines.inst = Baselines(os.path.join(UM.Resources.Resources.getDataStoragePath(), "r2d2_baselines"))
+		return Baselines.inst
+
+	def __init__(self, directory):
+		"""
+		Prepares to store baselines in a directory.
+		:param directory: The directory to store the baselines in. It will be
+		created if it doesn't exist yet.
+		"""
+		self._directory = directory
+		self._baselines = {} #The baselines that were loaded, by their identifier.
+		self._lock = threading.Lock()
+		if not os.path.exists(self._directory):
+			os.mkdir(self._directory)
+
+		self._current_path = os.path.join(self._directory, "current.json")
+		self._current = {} #For each printer type, the identifier of its current baseline.
+		if os.path.exists(self._current_path):
+			try:
+				with open(self._current_path) as f:
+					self._current = json.load(f)
+			except (OSError, ValueError) as e:
+				UM.Logger.Logger.log("w", "Unable to read the current baselines: {err}".format(err=str(e)))
+
+	def encode(self, printer_type, settings):
+		"""
+		Stores the settings of an extruder relative to the baseline of its
+		printer.
+		:param printer_type: The printer that the settings were used on.
+		:param settings: A dictionary with all settings of the extruder.
+		:return: The settings of the extruder, relative to the baseline.
+		"""
+		if not settings:
+			return ExtruderSettings.ExtruderSettings()
+		with self._lock:
+			baseline_id = self._current.get(printer_type)
+			if baseline_id is not None:
+				result = ExtruderSettings.ExtruderSettings.encode(baseline_id, self._get(baseline_id), settings)
+				if result.num_differences() <= self.rebase_ratio * len(settings):
+					return result
+			baseline_id = self._create(printer_type, settings)
+			return ExtruderSettings.ExtruderSettings.encode(baseline_id, self._get(baseline_id), settings)
+
+	def decode(self, document, printer_type):
+		"""
+		Reads the serialised settings of an extruder.
+
+		Documents that contain all settings, as stored by older versions, are
+		encoded relative to the baseline of their printer.
+		:param document: A serialised extruder.
+		:param printer_type: The printer that the settings were used on.
+		:return: The settings of the extruder.
+		"""
+		if ExtruderSettings.ExtruderSettings.is_serialised(document):
+			with self._lock:
+				baseline = self._get(document["baseline"])
+			return ExtruderSettings.ExtruderSettings.deserialise(document, baseline)
+		return self.encode(printer_type, document)
+
+	def import_from(self, directory):
+		"""
+		Copies the baselines of another installation that we don't have yet,
+		so that the prints of that installation can be read.
+
+		Baselines are named after their contents, so baselines with the same
+		name are the same and don't need to be copied. The current baselines of
+		our printers don't change.
+		:param directory: The directory with the baselines of the other
+		installation.
+		"""
+		if not os.path.isdir(directory):
+			return
+		with self._lock:
+			for file_name in os.listdir(directory):
+				if not file_name.endswith(".json") or file_name == "current.json":
+					continue
+				file_path = os.path.join(self._directory, file_name)
+				if os.path.exists(file_path):
+					continue
+				try:
+					with open(os.path.join(directory, file_name)) as f:
+						contents = f.read()
+					self._write(file_path, contents)
+				except OSError as e:
+					UM.Logger.Logger.log("e", "Unable to import baseline {file_name}: {err}".format(file_name=file_name, err=str(e)))
+
+	def _get(self, baseline_id):
+		"""
+		Gets the settings of a baseline, loading it if necessary.
+
+		The lock must be held while calling this.
+		:param baseline_id: The identifier of the baseline.
+		:return: The settings of the baseline. If it can't be loaded, this is
+		empty.
+		"""
+		if baseline_id is None:
+			return {}
+		if baseline_id not in self._baselines:
+			file_path = os.path.join(self._directory, baseline_id + ".json")
+			try:
+				with open(file_path) as f:
+					self._baselines[baseline_id] = {ExtruderSettings.ExtruderSettings.intern(key): ExtruderSettings.ExtruderSettings.intern(value) for key, value in json.load(f).items()}
+			except (OSError, ValueError) as e:
+				UM.Logger.Logger.log("e", "Unable to load baseline {file_path}. The settings of prints that refer to it are incomplete: {err}".format(file_path=file_path, err=str(e)))
+				self._baselines[baseline_id] = {}
+		return self._baselines[baseline_id]
+
+	def _create(self, printer_type, settings):
+		"""
+		Makes a set of settings the current baseline of a printer.
+
+		The lock must be held while calling this.
+		:param printer_type: The printer to make the baseline for.
+		:param settings: The settings of the baseline.
+		:return: The identifier of the new baseline, or `None` if it couldn't
+		be saved.
+		"""
+		serialised = json.dumps(settings, sort_keys=True)
+		baseline_id = hashlib.sha1(serialised.encode("utf-8")).hexdigest()
+		file_path = os.path.join(self._directory, baseline_id + ".json")
+		try:
+			if not os.path.exists(file_path):
+				self._write(file_path, serialised)
+			self._current[printer_type] = baseline_id
+			self._write(self._current_path, json.dumps(self._current, indent="\t"))
+		except OSError as e:
+			UM.Logger.Logger.log("e", "Unable to save baseline for {printer_type}: {err}".format(printer_type=printer_type, err=str(e)))
+			return None #Prints will then store all of their settings.
+		self._baselines[baseline_id] = {ExtruderSettings.ExtruderSettings.intern(key): ExtruderSettings.ExtruderSettings.intern(value) for key, value in settings.items()}
+		return baseline_id
+
+	@staticmethod
+	def _write(file_path, contents):
+		"""
+		Writes a file atomically, so that it's never left half-written.
+		:param file_path: The file to write.
+		:param contents: The text to write to it.
+		"""
+		temporary_path = file_path + ".tmp"
+		with open(temporary_path, "w") as f:
+			f.write(contents)
+		os.replace(temporary_path, file_path)
\ No newline at end of file
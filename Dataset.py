@@ -0,0 +1,139 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+import json #To store the names of the columns.
+import numpy #To store the columns in a compact binary format.
+import os #To find the files of the columns.
+
+from . import EvaluationMatrix #The evaluations are stored as an evaluation matrix.
+
+class Dataset:
+	"""
+	The training data of a partition, in columnar form.
+
+	This holds the evaluations of the prints as an evaluation matrix, the
+	numeric and boolean settings of the evaluated extruders as a matrix of
+	floats, and the categorical settings as a matrix of codes. Each row is one
+	print. Settings that a print doesn't have are NaN in the numeric matrix
+	and -1 in the matrix of codes. Each code is the index of the option in the
+	sorted options of that setting.
+
+	A dataset can be exported to a directory with one `.npy` file per matrix
+	and a `dataset.json` with the names of the columns. When it's loaded again,
+	the matrices are memory-mapped, so that datasets that are larger than the
+	memory can be trained on.
+	"""
+
+	def __init__(self, partition, evaluations, numeric_settings, numeric, categorical_settings, options, codes):
+		"""
+		Creates a dataset from its columns.
+		:param partition: A tuple of the printer type, nozzle and material, or
+		`None` if the prints are not from one partition.
+		:param evaluations: The evaluation matrix of the prints.
+		:param numeric_settings: The setting of each column of the numeric
+		matrix.
+		:param numeric: A matrix of setting values, with one row per print and
+		one column per numeric or boolean setting.
+		:param categorical_settings: The setting of each column of the matrix
+		of codes.
+		:param options: For each categorical setting, the list of its options.
+		:param codes: A matrix of option indices, with one row per print and
+		one column per categorical setting.
+		"""
+		self.partition = partition
+		self.evaluations = evaluations
+		self.numeric_settings = numeric_settings
+		self.numeric = numeric
+		self.categorical_settings = categorical_settings
+		self.options = options
+		self.codes = codes
+
+	def __len__(self):
+		"""
+		Gets the number of prints in this dataset.
+		:return: The number of rows.
+		"""
+		return len(self.evaluations)
+
+	@staticmethod
+	def from_prints(prints, partition=None):
+		"""
+		Translates prints to a dataset.
+
+		Settings that are numeric or boolean in every print that has them go
+		to the numeric matrix. Settings that are strings in every print that
+		has them are dictionary-encoded in the matrix of codes. Other settings,
+		such as lists, are left out.
+		:param prints: The prints to translate.
+		:param partition: The partition that the prints belong to, if any.
+		:return: A dataset with the prints.
+		"""
+		evaluations = EvaluationMatrix.EvaluationMatrix([prnt.evaluation() for prnt in prints])
+		all_settings = [prnt.evaluated_extruder_settings() for prnt in prints]
+
+		numeric_settings = []
+		numeric = []
+		categorical_settings = []
+		options = []
+		codes = []
+		for setting in sorted(set().union(*(settings.keys() for settings in all_settings))): #Not every print needs to have every setting.
+			values = [settings.get(setting) for settings in all_settings]
+			present = [value for value in values if value is not None]
+			if all(type(value) in (bool, int, float) for value in present):
+				numeric_settings.append(setting)
+				numeric.append(numpy.array(values, dtype=float)) #Converts None to NaN.
+			elif all(type(value) is str for value in present):
+				setting_options, setting_codes = numpy.unique(present, return_inverse=True)
+				column = numpy.full(len(values), -1, dtype=numpy.int32)
+				column[[value is not None for value in values]] = setting_codes
+				categorical_settings.append(setting)
+				options.append(setting_options.tolist())
+				codes.append(column)
+			#Else skip. We always fill in list settings as an empty list. TODO: Generate empty list [].
+
+		numeric = numpy.stack(numeric, axis=1) if numeric else numpy.zeros((len(prints), 0))
+		codes = numpy.stack(codes, axis=1) if codes else numpy.zeros((len(prints), 0), dtype=numpy.int32)
+		return Dataset(partition, evaluations, numeric_settings, numeric, categorical_settings, options, codes)
+
+	@staticmethod
+	def load(directory, memory_map=True):
+		"""
+		Loads a dataset that was exported with `save`.
+		:param directory: The directory that the dataset was exported to.
+		:param memory_map: Whether to map the matrices into memory rather than
+		reading them right away.
+		:return: The dataset.
+		"""
+		mode = "r" if memory_map else None
+		with open(os.path.join(directory, "dataset.json")) as f:
+			header = json.load(f)
+		evaluations = EvaluationMatrix.EvaluationMatrix.from_arrays(header["evaluation_keys"], numpy.load(os.path.join(directory, "evaluations.npy"), mmap_mode=mode), numpy.load(os.path.join(directory, "evaluations_missing.npy"), mmap_mode=mode))
+		partition = tuple(header["partition"]) if header["partition"] is not None else None
+		return Dataset(partition, evaluations, header["numeric_settings"], numpy.load(os.path.join(directory, "numeric.npy"), mmap_mode=mode), header["categorical_settings"], header["options"], numpy.load(os.path.join(directory, "codes.npy"), mmap_mode=mode))
+
+	def save(self, directory):
+		"""
+		Exports this dataset to a directory.
+
+		The header is written last, so a dataset that couldn't be exported
+		completely can't be loaded.
+		:param directory: The directory to export to. It will be created if it
+		doesn't exist yet.
+		"""
+		if not os.path.exists(directory):
+			os.makedirs(directory)
+		numpy.save(os.path.join(directory, "evaluations.npy"), self.evaluations.values)
+		numpy.save(os.path.join(directory, "evaluations_missing.npy"), self.evaluations.missing)
+		numpy.save(os.path.join(directory, "numeric.npy"), self.numeric)
+		numpy.save(os.path.join(directory, "codes.npy"), self.codes)
+		header = {
+			"partition": self.partition,
+			"evaluation_keys": self.evaluations.keys,
+			"numeric_settings": self.numeric_settings,
+			"categorical_settings": self.categorical_settings,
+			"options": self.options
+		}
+		temporary_path = os.path.join(directory, "dataset.json.tmp")
+		with open(temporary_path, "w") as f:
+			json.dump(header, f)
+		os.replace(temporary_path, os.path.join(directory, "dataset.json"))
\ No newline at end of file
@@ -0,0 +1,121 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+import collections #To keep the cache in order of use.
+import hashlib #To recognise predictors that were expanded before.
+import numpy
+import threading #To protect the cache when training on multiple threads.
+
+class DesignMatrix:
+	"""
+	Expands predictors to the terms of a polynomial, so that a linear learner
+	can fit a polynomial to them.
+
+	For every predictor `x`, the design matrix gets a column for each of
+	`x^1`, `x^2`, ..., up to the highest exponent. One column of ones is added
+	in front for the constant term. Optionally the products of each pair of
+	predictors (`x * y`) are added at the end as cross terms.
+
+	Expanding is done for all samples at once. Because many learners train on
+	exactly the same predictors (such as different settings trained on the
+	same evaluations), the expanded matrices are cached.
+	"""
+
+	cache_size = 16 #How many expanded matrices to remember.
+
+	_cache = collections.OrderedDict() #Maps the fingerprint of the predictors and the expansion parameters to expanded matrices.
+	_cache_lock = threading.Lock()
+
+	@staticmethod
+	def expand(predictors, highest_exponent, cross_terms=False):
+		"""
+		Gets the design matrix for a set of predictors.
+
+		The result may be shared with other callers, so it must not be
+		modified.
+		:param predictors: A two-dimensional Numpy array with one row for each
+		sample and one column for each predictor.
+		:param highest_exponent: The highest exponent of the polynomial.
+		:param cross_terms: Whether to add the products of each pair of
+		predictors as well.
+		:return: A two-dimensional Numpy array with one row for each sample and
+		one column for each term of the polynomial.
+		"""
+		predictors = numpy.ascontiguousarray(predictors, dtype=float)
+		key = (hashlib.sha1(predictors.tobytes()).hexdigest(), predictors.shape, highest_exponent, cross_terms)
+		with DesignMatrix._cache_lock:
+			if key in DesignMatrix._cache:
+				DesignMatrix._cache.move_to_end(key)
+				return DesignMatrix._cache[key]
+
+		result = DesignMatrix.expand_uncached(predictors, highest_exponent, cross_terms)
+		result.flags.writeable = False #Shared by everyone who expands the same predictors.
+
+		with DesignMatrix._cache_lock:
+			DesignMatrix._cache[key] = result
+			while len(DesignMatrix._cache) > DesignMatrix.cache_size:
+				DesignMatrix._cache.popitem(last=False) #Remove the least recently used one.
+		return result
+
+	@staticmethod
+	def expand_uncached(predictors, highest_exponent, cross_terms=False):
+		"""
+		Creates the design matrix for a set of predictors without using the
+		cache.
+
+		This is cheaper than `expand` for predictors that are unlikely to be
+		expanded again, such as a single sample.
+		:param predictors: A two-dimensional Numpy array with one row for each
+		sample and one column for each predictor.
+		:param highest_exponent: The highest exponent of the polynomial.
+		:param cross_terms: Whether to add the products of each pair of
+		predictors as well.
+		:return: A two-dimensional Numpy array with one row for each sample and
+		one column for each term of the polynomial.
+		"""
+		predictors = numpy.asarray(predictors, dtype=float)
+		num_samples, num_predictors = predictors.shape
+		exponents = numpy.arange(1, highest_exponent + 1)
+		powers = (predictors[:, :, numpy.newaxis] ** exponents).reshape((num_samples, num_predictors * highest_exponent)) #All exponents of the first predictor, then all of the second, etc.
+		parts = [numpy.ones((num_samples, 1)), powers]
+		if cross_terms:
+			left, right = numpy.triu_indices(num_predictors, 1)
+			parts.append(predictors[:, left] * predictors[:, right])
+		return numpy.hstack(parts)
+
+	@staticmethod
+	def standardisation(design):
+		"""
+		Finds how to standardise the terms of a design matrix.
+
+		Higher powers of large evaluation entries (such as the print time in
+		seconds) are many orders of magnitude larger than the other terms. A
+		least squares problem on such terms can't be solved accurately in
+		floating point, so the terms are centred and scaled to a similar
+		magnitude first. The constant term is kept as it is.
+		:param design: A design matrix, with one row for each sample.
+		:return: A tuple of the mean to subtract from each term and the scale
+		to divide each term by.
+		"""
+		means = numpy.mean(design, axis=0)
+		scales = numpy.std(design, axis=0)
+		constant = scales == 0
+		scales[constant] = numpy.maximum(numpy.abs(means[constant]), 1) #Terms that are the same in all samples vanish when centred, but other samples may still come later.
+		means[0] = 0
+		scales[0] = 1
+		return means, scales
+
+	@staticmethod
+	def unstandardise(coefficients, means, scales):
+		"""
+		Translates the multipliers of standardised terms to multipliers of the
+		original terms.
+		:param coefficients: The multipliers of the standardised terms, with
+		the constant term first. May have a column for each setting.
+		:param means: The mean that was subtracted from each term.
+		:param scales: The scale that each term was divided by.
+		:return: The multipliers of the original terms.
+		"""
+		result = coefficients / scales.reshape((-1,) + (1,) * (coefficients.ndim - 1))
+		result[0] -= numpy.tensordot(means, result, axes=1)
+		return result
@@ -0,0 +1,75 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+import numpy
+
+class EvaluationMatrix:
+	"""
+	A columnar representation of the evaluations of a set of prints.
+
+	Each row in this matrix is one print. Each column is one evaluation entry.
+	The columns are sorted by their key, so that the same set of evaluation
+	entries always results in the same column index, regardless of the order
+	in which the prints were evaluated.
+
+	Evaluation entries that were not filled in for a print are stored as 0 in
+	the values, but are marked as missing in a separate mask. That way the
+	learners can still do their matrix operations on the values while the
+	missing entries can be recognised where it matters.
+	"""
+
+	def __init__(self, evaluations):
+		"""
+		Builds the matrix from a list of evaluations.
+		:param evaluations: A list of dictionaries of evaluations, one for each
+		print.
+		"""
+		self.keys = sorted(set().union(*evaluations)) #The column index: The evaluation entry of each column.
+		self.columns = {key: index for index, key in enumerate(self.keys)} #Maps evaluation entries back to their column index.
+
+		#Flatten all evaluations in one pass, so that Numpy can convert it all at once.
+		missing = object()
+		flat = [evaluation.get(key, missing) for evaluation in evaluations for key in self.keys]
+		self.missing = numpy.array([value is missing for value in flat], dtype=bool).reshape((len(evaluations), len(self.keys)))
+		self.values = numpy.array([0 if value is missing else value for value in flat], dtype=float).reshape((len(evaluations), len(self.keys)))
+
+	def __len__(self):
+		"""
+		Gets the number of prints in this matrix.
+		:return: The number of rows.
+		"""
+		return self.values.shape[0]
+
+	@staticmethod
+	def from_arrays(keys, values, missing):
+		"""
+		Creates a matrix from arrays that were translated before, for instance
+		when they were exported.
+		:param keys: The evaluation entry of each column.
+		:param values: The values of the evaluations, with one row per print.
+		:param missing: Which of the values were not filled in.
+		:return: An evaluation matrix with those arrays.
+		"""
+		result = EvaluationMatrix.__new__(EvaluationMatrix)
+		result.keys = list(keys)
+		result.columns = {key: index for index, key in enumerate(result.keys)}
+		result.values = values
+		result.missing = missing
+		return result
+
+	def select(self, rows):
+		"""
+		Creates a matrix with a subset of the prints in this matrix.
+
+		The result keeps the same column index as this matrix, even if some of
+		the evaluation entries are missing from all of the selected prints.
+		Rows may be selected multiple times.
+		:param rows: A sequence of row indices to select.
+		:return: A new evaluation matrix with only the selected rows.
+		"""
+		result = EvaluationMatrix.__new__(EvaluationMatrix)
+		result.keys = self.keys
+		result.columns = self.columns
+		result.values = self.values[rows]
+		result.missing = self.missing[rows]
+		return result
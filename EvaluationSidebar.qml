@@ -86,8 +86,14 @@ Rectangle {
 			right: parent.right
 			rightMargin: UM.Theme.getSize("sidebar_margin").width
 		}
-		text: "Train"
-		onClicked: Prints.train()
+		text: Prints.is_training ? catalog.i18nc("@action:button", "Cancel Training") : catalog.i18nc("@action:button", "Train")
+		onClicked: {
+			if(Prints.is_training) {
+				Prints.cancel_training();
+			} else {
+				Prints.train();
+			}
+		}
 
 		style: ButtonStyle {
 			background: Rectangle {
@@ -115,11 +121,49 @@ Rectangle {
 		}
 	}
 
+	//Progress of the training.
+	ProgressBar {
+		id: training_progress
+		anchors {
+			top: train_button.bottom
+			topMargin: visible ? UM.Theme.getSize("sidebar_margin").height : 0
+			left: parent.left
+			leftMargin: UM.Theme.getSize("sidebar_margin").width
+			right: parent.right
+			rightMargin: UM.Theme.getSize("sidebar_margin").width
+		}
+		height: visible ? UM.Theme.getSize("progressbar").height : 0
+		visible: Prints.is_training
+		minimumValue: 0
+		maximumValue: 1
+		value: Prints.training_progress
+		style: UM.Theme.styles.progressbar
+	}
+
+	//Statistics of where the time is spent, if they are being gathered.
+	Label {
+		id: statistics
+		anchors {
+			top: training_progress.bottom
+			topMargin: visible ? UM.Theme.getSize("sidebar_margin").height : 0
+			left: parent.left
+			leftMargin: UM.Theme.getSize("sidebar_margin").width
+			right: parent.right
+			rightMargin: UM.Theme.getSize("sidebar_margin").width
+		}
+		height: visible ? implicitHeight : 0
+		visible: Prints.stats != ""
+		text: Prints.stats
+		wrapMode: Text.Wrap
+		font: UM.Theme.getFont("default")
+		color: UM.Theme.getColor("text")
+	}
+
 	//The evaluation form.
 	ScrollView {
 		id: evaluation_form
 		anchors {
-			top: train_button.bottom
+			top: statistics.bottom
 			topMargin: UM.Theme.getSize("sidebar_margin").height
 			bottom: parent.bottom
 			left: parent.left
@@ -0,0 +1,131 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+import collections.abc #To behave like a read-only dictionary.
+import sys #To intern the setting keys and values.
+
+class ExtruderSettings(collections.abc.Mapping):
+	"""
+	The settings that were used for one extruder of a print.
+
+	Most settings are the same in every print on the same printer. Instead of
+	a full dictionary for every print, this refers to a baseline dictionary
+	that is shared by many prints, and only keeps the settings that differ
+	from it. Setting keys and string values are interned, so that equal
+	strings are stored only once.
+
+	These settings can be read like a dictionary, but not changed.
+	"""
+
+	__slots__ = ("baseline_id", "_baseline", "_changed", "_removed", "_length")
+
+	def __init__(self, baseline_id=None, baseline=None, changed=None, removed=frozenset()):
+		"""
+		Creates the settings of an extruder.
+		:param baseline_id: The identifier of the baseline, or `None` if there
+		is no baseline.
+		:param baseline: The settings of the baseline. This dictionary is
+		shared, so it must not be changed.
+		:param changed: The settings that differ from the baseline, or are not
+		in the baseline at all.
+		:param removed: The settings of the baseline that these settings don't
+		have.
+		"""
+		self.baseline_id = baseline_id
+		self._baseline = baseline if baseline is not None else {}
+		self._changed = changed if changed is not None else {}
+		self._removed = removed
+		self._length = len(self._baseline) - len(self._removed) + sum(1 for key in self._changed if key not in self._baseline)
+
+	@staticmethod
+	def encode(baseline_id, baseline, settings):
+		"""
+		Creates the settings of an extruder from a full dictionary of settings.
+		:param baseline_id: The identifier of the baseline to compare with.
+		:param baseline: The settings of the baseline.
+		:param settings: The settings of the extruder.
+		:return: The settings, stored as their differences with the baseline.
+		"""
+		changed = {}
+		for key, value in settings.items():
+			if key not in baseline or type(baseline[key]) is not type(value) or baseline[key] != value: #Also compare the type, since True == 1 == 1.0.
+				changed[sys.intern(key)] = ExtruderSettings.intern(value)
+		removed = frozenset(key for key in baseline if key not in settings)
+		return ExtruderSettings(baseline_id, baseline, changed, removed)
+
+	@staticmethod
+	def deserialise(document, baseline):
+		"""
+		Creates the settings of an extruder from their serialised form.
+		:param document: A dictionary as produced by `serialise`.
+		:param baseline: The settings of the baseline that the document refers
+		to.
+		:return: The settings of the extruder.
+		"""
+		changed = {sys.intern(key): ExtruderSettings.intern(value) for key, value in document["changed"].items()}
+		return ExtruderSettings(document["baseline"], baseline, changed, frozenset(sys.intern(key) for key in document["removed"]))
+
+	@staticmethod
+	def is_serialised(document):
+		"""
+		Checks whether a serialised extruder is in the form produced by
+		`serialise`, rather than a full dictionary of settings.
+		:param document: A serialised extruder.
+		:return: `True` if the document refers to a baseline, or `False` if it
+		contains all settings.
+		"""
+		return document.keys() == {"baseline", "changed", "removed"}
+
+	@staticmethod
+	def intern(value):
+		"""
+		Interns a setting value if it is a string.
+		:param value: A setting value.
+		:return: The same value, interned if possible.
+		"""
+		if type(value) is str:
+			return sys.intern(value)
+		return value
+
+	def serialise(self):
+		"""
+		Gets a representation of these settings that can be stored.
+		:return: A dictionary with the identifier of the baseline and the
+		differences with it.
+		"""
+		return {
+			"baseline": self.baseline_id,
+			"changed": self._changed,
+			"removed": sorted(self._removed)
+		}
+
+	def num_differences(self):
+		"""
+		How many settings differ from the baseline.
+		:return: The number of changed, added and removed settings.
+		"""
+		return len(self._changed) + len(self._removed)
+
+	def __getitem__(self, key):
+		if key in self._changed:
+			return self._changed[key]
+		if key in self._removed:
+			raise KeyError(key)
+		return self._baseline[key]
+
+	def get(self, key, default=None):
+		#Faster than the default implementation, which goes through an exception for settings that are missing.
+		if key in self._changed:
+			return self._changed[key]
+		if key in self._removed:
+			return default
+		return self._baseline.get(key, default)
+
+	def __iter__(self):
+		for key in self._baseline:
+			if key not in self._changed and key not in self._removed:
+				yield key
+		yield from self._changed
+
+	def __len__(self):
+		return self._length
\ No newline at end of file
@@ -0,0 +1,236 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+import functools #To load the prints lazily.
+import json #To serialise the prints to JSON.
+import os #To find the files of the prints.
+import UM.Logger
+
+from . import PrintRecord #To deserialise the prints.
+from . import PrintStore #The interface we're implementing.
+
+class JsonPrintStore(PrintStore.PrintStore):
+	"""
+	Stores each print as a separate JSON file in a directory.
+
+	The files are named after the time and date and the name of the print.
+	The headers of the prints are cached in an index file, together with the
+	modification time and size of each file. That way only the files that
+	changed since the index was written need to be parsed at start-up. The
+	rest of each print is loaded when it's first needed.
+	"""
+
+	def __init__(self, directory, index_path=None):
+		"""
+		Creates a store that saves its prints in a certain directory.
+		:param directory: The directory to store the prints in. It will be
+		created if it doesn't exist yet.
+		:param index_path: Where to cache the headers of the prints. If not
+		provided, the headers are not cached.
+		"""
+		self._directory = directory
+		self._index_path = index_path
+		self._entries = None #Once the headers are loaded, for each file the modification time, size and header of its print, as they were when last seen.
+		if not os.path.exists(self._directory):
+			os.mkdir(self._directory) #Create if it didn't exist yet.
+
+	def file_path(self, time_date, name):
+		"""
+		Generates the file path that a print is saved to.
+		:param time_date: The time and date of the print.
+		:param name: The name of the print.
+		:return: The file path of the print on disk.
+		"""
+		return os.path.join(self._directory, time_date + "_" + name + ".json")
+
+	def load(self, file_path):
+		"""
+		Loads one print from a file.
+		:param file_path: The path to the JSON file of the print.
+		:return: The print stored in that file.
+		"""
+		return PrintRecord.PrintRecord.deserialise(self._read(file_path))
+
+	def load_all(self):
+		"""
+		Loads all prints in the directory.
+
+		Files that can't be read are skipped.
+		:return: A list of prints.
+		"""
+		result = []
+		for file_name in self._file_names():
+			file_path = os.path.join(self._directory, file_name)
+			try:
+				result.append(self.load(file_path))
+			except (OSError, ValueError, KeyError) as e:
+				UM.Logger.Logger.log("w", "Unable to load print {file_path}: {err}".format(file_path=file_path, err=str(e)))
+		return result
+
+	def load_headers(self):
+		"""
+		Loads all prints in the directory, but only their headers.
+
+		The headers are taken from the index where possible. Only files that
+		are new or changed since the index was written are parsed. The index
+		is updated afterwards if anything changed.
+		:return: A list of prints.
+		"""
+		if self._index_path is None:
+			return self.load_all()
+
+		old_index = {}
+		if os.path.exists(self._index_path):
+			try:
+				with open(self._index_path) as f:
+					old_index = json.load(f)
+			except (OSError, ValueError) as e:
+				UM.Logger.Logger.log("w", "Unable to read the print index. Rebuilding it. {err}".format(err=str(e)))
+
+		self._entries, _ = self._scan(old_index)
+		if self._entries != old_index:
+			self._write_index()
+		return [self._header_print(file_name, entry) for file_name, entry in self._entries.items()]
+
+	def rescan(self):
+		"""
+		Finds the prints that were added, changed or removed in the directory
+		by other programs since the headers were loaded or last rescanned.
+
+		Only files that are new or whose size or modification time changed are
+		parsed. Files that this store wrote itself are not reported.
+		:return: A tuple of two lists. The first contains the headers of the
+		new and changed prints. The second contains the time and date and name
+		of the removed and changed prints.
+		"""
+		if self._entries is None: #Headers were never loaded, so there is nothing to compare with.
+			return [], []
+		entries, parsed = self._scan(self._entries)
+		removed = [(entry["header"]["time_date"], entry["header"]["name"]) for file_name, entry in self._entries.items() if file_name not in entries or file_name in parsed]
+		added = [self._header_print(file_name, entries[file_name]) for file_name in parsed]
+		self._entries = entries
+		if added or removed:
+			self._write_index()
+		return added, removed
+
+	def watched_directory(self):
+		"""
+		Gets the directory that other programs may add prints to.
+		:return: The directory with the JSON files.
+		"""
+		return self._directory
+
+	def _scan(self, known_entries):
+		"""
+		Lists the prints in the directory, parsing only the files that are not
+		known yet or that changed since they were known.
+		:param known_entries: For each known file, a dictionary with its
+		modification time, size and the header of its print.
+		:return: A tuple of two. The first is a dictionary with the entries of
+		all files. The second is a list of the files that had to be parsed.
+		"""
+		entries = {}
+		parsed = []
+		for file_name in self._file_names():
+			file_path = os.path.join(self._directory, file_name)
+			try:
+				stat = os.stat(file_path)
+				entry = known_entries.get(file_name)
+				if entry is None or entry["mtime"] != stat.st_mtime or entry["size"] != stat.st_size: #New or changed file. Need to parse it.
+					entry = {
+						"mtime": stat.st_mtime,
+						"size": stat.st_size,
+						"header": self.load(file_path).header()
+					}
+					parsed.append(file_name)
+			except (OSError, ValueError, KeyError) as e:
+				UM.Logger.Logger.log("w", "Unable to load print {file_path}: {err}".format(file_path=file_path, err=str(e)))
+				continue
+			entries[file_name] = entry
+		return entries, parsed
+
+	def _header_print(self, file_name, entry):
+		"""
+		Creates a print from an entry of the index, which loads the rest of
+		the print once it's needed.
+		:param file_name: The file that the print is stored in.
+		:param entry: The entry of the file in the index.
+		:return: A print with only its header loaded.
+		"""
+		return PrintRecord.PrintRecord.deserialise_header(entry["header"], functools.partial(self._read, os.path.join(self._directory, file_name)))
+
+	def _write_index(self):
+		"""
+		Writes the entries of all files to the index.
+		"""
+		try:
+			with open(self._index_path, "w") as f:
+				json.dump(self._entries, f)
+		except OSError as e:
+			UM.Logger.Logger.log("w", "Unable to write the print index: {err}".format(err=str(e)))
+
+	def query(self, printer_type=None, nozzle=None, material=None, since=None, until=None):
+		"""
+		Loads the prints that match certain criteria.
+
+		This needs to load every print to see whether they match.
+		:param printer_type: The definition ID of the printer that the prints
+		must be made with.
+		:param nozzle: The nozzle that the evaluated extruder must have used.
+		:param material: The material that the evaluated extruder must have
+		used.
+		:param since: The earliest time and date of the prints, inclusive.
+		:param until: The latest time and date of the prints, inclusive.
+		:return: A list of the matching prints, sorted by their time and date.
+		"""
+		result = [prnt for prnt in self.load_all() if self._matches(prnt, printer_type, nozzle, material, since, until)]
+		return sorted(result, key=lambda prnt: prnt.time_date)
+
+	def _file_names(self):
+		"""
+		Lists the files in the directory that contain prints.
+		:return: A list of file names.
+		"""
+		return [file_name for file_name in os.listdir(self._directory) if file_name.endswith(".json")]
+
+	def _read(self, file_path):
+		"""
+		Reads the serialised form of a print from a file.
+		:param file_path: The path to the JSON file of the print.
+		:return: A dictionary as produced by `Print.serialise`.
+		"""
+		with open(file_path) as f:
+			return json.load(f)
+
+	def save(self, prnt):
+		"""
+		Saves a print to its JSON file.
+
+		The file is written to a temporary file first, which then replaces the
+		original file. That way the original is never left half-written.
+		:param prnt: The print to save.
+		"""
+		file_path = self.file_path(prnt.time_date, prnt.name)
+		temporary_path = file_path + ".tmp"
+		with open(temporary_path, "w") as f:
+			json.dump(prnt.serialise(), f, indent="\t")
+		os.replace(temporary_path, file_path)
+		if self._entries is not None: #Remember what we wrote, so that rescanning doesn't see it as a change by someone else.
+			stat = os.stat(file_path)
+			self._entries[os.path.basename(file_path)] = {
+				"mtime": stat.st_mtime,
+				"size": stat.st_size,
+				"header": prnt.header()
+			}
+
+	def remove(self, time_date, name):
+		"""
+		Removes the JSON file of a print, if it exists.
+		:param time_date: The time and date of the print to remove.
+		:param name: The name of the print to remove.
+		"""
+		file_path = self.file_path(time_date, name)
+		if os.path.exists(file_path):
+			os.remove(file_path)
+		if self._entries is not None:
+			self._entries.pop(os.path.basename(file_path), None)
\ No newline at end of file
@@ -4,6 +4,10 @@
 import numpy
 import UM.Logger
 
+from . import DesignMatrix #To expand the predictors to the terms of a polynomial.
+from . import EvaluationMatrix #To translate the evaluations to a matrix.
+from . import Statistics #To measure how long training takes.
+
 class LeastSquares:
 	"""
 	Implementation of the least squares linear regression algorithm.
@@ -19,7 +23,7 @@ class LeastSquares:
 	dimensions times the highest exponent starts to become big-ish (>2000),
 	this training method will start to take very long to compute. The bulk of
 	the computation time lies in inverting a matrix of `N` by `N`, where
-	`N = len(predictors) * (highest_exponent + 1)`. This is a cubic operation.
+	`N = len(predictors) * highest_exponent + 1`. This is a cubic operation.
 
 	The Least Squares learner works by solving the following formula:
 
@@ -33,72 +37,116 @@ class LeastSquares:
 	multiplication.
 	"""
 
-	def __init__(self, predictors, responses, highest_exponent=4):
+	ridge = 1e-10 #Regularisation of the normal equations of the standardised terms, per print. Keeps them solvable when prints don't vary enough.
+
+	def __init__(self, predictors, responses, highest_exponent=4, cross_terms=False, seed=None):
 		"""
 		Create a Least Squares curve fitter.
 
 		This also transforms the input data to Numpy arrays that the learner
 		can use.
 		:param predictors: A list of dictionaries of evaluations, one for each
-		print.
-		:param responses: A list of setting values, one for each print.
+		print, or an evaluation matrix that was already built from those.
+		:param responses: A list of setting values, one for each print. To
+		fit multiple settings at once, this may also be a two-dimensional array
+		with one row for each print and one column for each setting.
 		:param highest_exponent: How complex of a polynomial should be fit to
 		this data.
+		:param cross_terms: Whether to also fit the products of each pair of
+		predictors, to model how evaluation entries interact.
+		:param seed: A seed for choosing the bags to train on. Learners with
+		the same seed and the same number of prints use the same bags, so their
+		errors can be compared fairly. If `None`, the bags are random.
 		"""
-		#Have to translate the evaluations to a Numpy array.
-		self._predictors = numpy.zeros((len(predictors), len(predictors[0])))
-		all_keys = set()
-		for prt in predictors:
-			all_keys = all_keys.union(prt.keys())
-		all_keys = list(sorted(all_keys))
-		for print_index in range(len(predictors)):
-			for key_index in range(len(all_keys)):
-				if all_keys[key_index] in predictors[print_index]:
-					self._predictors[print_index][key_index] = predictors[print_index][all_keys[key_index]]
-
-		self._responses = numpy.array(responses)
+		#Have to translate the evaluations to a Numpy array, unless they were already translated.
+		if not isinstance(predictors, EvaluationMatrix.EvaluationMatrix):
+			predictors = EvaluationMatrix.EvaluationMatrix(predictors)
+		self._predictors = predictors.values
+
+		self._responses = numpy.array(responses, dtype=float)
 		self._highest_exponent = highest_exponent
+		self._cross_terms = cross_terms
+		self._random = numpy.random.RandomState(seed)
+
+		self.errors = None #After training, the mean squared error of the polynomial on the held-out prints, for each setting.
+		self.baseline_errors = None #After training, the mean squared error on the held-out prints when always predicting the mean of the training prints, for each setting.
+
+		#The linear solver fits the polynomial by fitting on each of its terms.
+		self._design = DesignMatrix.DesignMatrix.expand(self._predictors, self._highest_exponent, self._cross_terms)
 
 	def train(self):
 		"""
 		Fit a polynomial to the currently loaded data.
-		:return: A list containing the multipliers of each exponent.
-		"""
-		all_responses = []
-		for train_pred, train_resp, test_pred, test_resp in self._subdivide():
-			coefficients, _, _, _ = numpy.linalg.lstsq(train_pred, train_resp, rcond=None)
-			all_responses.append(coefficients)
-
-			#TODO: Measure efficiacy using test set.
-
-		#Create weighted average of all trainings.
-		average = numpy.ndarray(all_responses[0].shape)
-		for response in all_responses:
-			average += response #TODO: Weight averages using efficiacy.
-		average /= len(all_responses)
 
-		return average
+		The polynomial is fit on several bags of the data. The normal equations
+		of all bags are stacked and solved in a single call. Each bag is tested on
+		the prints that it didn't train on, and the bags are averaged with a
+		weight according to how well they predicted those. Afterwards, the
+		`errors` and `baseline_errors` of the learner are filled in.
+		:return: A list containing the multipliers of each term of the
+		polynomial. The first is the constant term. Then follow the multipliers
+		for each exponent of the first predictor, then of the second predictor,
+		and so on. If cross terms are enabled, the multipliers of the cross
+		terms follow at the end. If multiple settings are being fit at once,
+		this has one column of multipliers for each setting.
+		"""
+		with Statistics.Statistics.get_instance().timer("least_squares"):
+			#Standardise the terms before forming the normal equations, so that they can be solved accurately.
+			means, scales = DesignMatrix.DesignMatrix.standardisation(self._design)
+			design = (self._design - means) / scales
+
+			bags = self._subdivide()
+			if bags is None: #Too few prints to hold any out. Fit on all of them, without knowing how well that predicts.
+				coefficients, _, _, _ = numpy.linalg.lstsq(design, self._responses, rcond=None)
+				self.errors = numpy.full(self._responses.shape[1:], numpy.nan)
+				self.baseline_errors = numpy.full(self._responses.shape[1:], numpy.nan)
+				return DesignMatrix.DesignMatrix.unstandardise(coefficients, means, scales)
+			train_indices, test_indices = bags
+
+			#Solve the normal equations of all bags at once. Work with a column of responses even if there's only one setting, so that the solver sees a stack of matrices.
+			responses = self._responses.reshape((len(self._responses), -1))
+			train_predictors = design[train_indices] #One matrix per bag.
+			train_responses = responses[train_indices]
+			train_transposed = train_predictors.transpose((0, 2, 1))
+			xtx = numpy.matmul(train_transposed, train_predictors)
+			xty = numpy.matmul(train_transposed, train_responses)
+			xtx += self.ridge * train_indices.shape[1] * numpy.eye(xtx.shape[1]) #The terms are standardised, so the same ridge suits every term.
+			all_coefficients = numpy.linalg.solve(xtx, xty)
+
+			#Measure the efficacy of each bag on the prints it didn't train on, for all bags at once.
+			test_responses = responses[test_indices]
+			errors = numpy.mean((numpy.matmul(design[test_indices], all_coefficients) - test_responses) ** 2, axis=1) #One row per bag, with one column per setting.
+			baseline_errors = numpy.mean((test_responses - numpy.mean(train_responses, axis=1, keepdims=True)) ** 2, axis=1)
+
+			#Create weighted average of all trainings. Bags that predict their test prints better get more weight.
+			weights = 1 / (errors + 1e-12)
+			average = numpy.sum(weights[:, numpy.newaxis] * all_coefficients, axis=0) / numpy.sum(weights, axis=0)
+			self.errors = numpy.mean(errors, axis=0).reshape(self._responses.shape[1:])
+			self.baseline_errors = numpy.mean(baseline_errors, axis=0).reshape(self._responses.shape[1:])
+			return DesignMatrix.DesignMatrix.unstandardise(average, means, scales).reshape(average.shape[:1] + self._responses.shape[1:])
 
 	def _subdivide(self, num_bags=5, ratio_train=0.8):
 		"""
 		Subdivide the training data into bags that we can train on separately.
 		Each bag is selected randomly from the original sample set. There is
 		no dependency between the bags. There may be overlap.
+
+		All bags are drawn at once from the random state of this learner, so
+		the same seed always gives the same bags.
 		:param num_bags: How many divisions to make.
 		:param ratio_train: The fraction of the training data that must end up
 		in the training set.
-		:return: A sequence of tuples of four. The first entry is the
-		predictors that are selected. The second entry is the responses that
-		are selected. The third entry is the predictors that were not
-		selected. The fourth entry is the responses that were not selected.
+		:return: A tuple of two matrices of indices of prints, with one row per
+		bag. The first has the prints that each bag trains on, the second the
+		prints that each bag is tested on. If there are too few prints to
+		divide, `None` is returned.
 		"""
 		num_samples = len(self._responses)
 		train_samples = int(num_samples * ratio_train)
 		test_samples = num_samples - train_samples
 		if train_samples == 0 or test_samples == 0:
 			UM.Logger.Logger.log("e", "Too few samples! Training samples: {train_samples}. Testing samples: {test_samples}.".format(train_samples=train_samples, test_samples=test_samples))
-			return
+			return None
 
-		for bag in range(num_bags):
-			permutation = numpy.random.permutation(num_samples)
-			yield self._predictors[permutation[0:train_samples]], self._responses[permutation[0:train_samples]], self._predictors[permutation[train_samples:]], self._responses[permutation[train_samples:]]
\ No newline at end of file
+		permutations = numpy.argsort(self._random.random_sample((num_bags, num_samples)), axis=1) #A random permutation of the prints in each row.
+		return permutations[:, :train_samples], permutations[:, train_samples:]
\ No newline at end of file
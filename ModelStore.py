@@ -0,0 +1,256 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+import hashlib #To fingerprint the training data and to name the model files.
+import json #To fingerprint the setting values.
+import numpy #To store the models in a compact binary format.
+import os #To find the stored models.
+import UM.Logger
+import UM.Resources #To find the data directory.
+
+class ModelStore:
+	"""
+	Stores the trained models persistently.
+
+	A model is stored for every combination of printer type, nozzle and
+	material (a partition). For each setting the model contains the
+	multipliers of the polynomial that computes the setting from the
+	evaluation, as well as a fingerprint of the data that it was trained on
+	and the error of the polynomial on the prints that were held out. If the
+	fingerprint of a setting didn't change, it doesn't need to be trained
+	again.
+
+	Categorical settings have a column of multipliers for each of their
+	options. The `options` of the model name the option of each column, or are
+	`None` for columns of numeric settings.
+
+	Each partition is stored in a separate `.npz` file. All files are loaded
+	when the store is created, so the models are available right away.
+	"""
+
+	inst = None
+
+	@staticmethod
+	def get_instance():
+		"""
+		Get an instance of this class.
+
+		This implements the singleton pattern.
+		:return: An instance of this class.
+		"""
+		if ModelStore.inst is None:
+			ModelStore.inst = ModelStore(os.path.join(UM.Resources.Resources.getDataStoragePath(), "r2d2_models"))
+		return ModelStore.inst
+
+	def __init__(self, directory):
+		"""
+		Loads all models that are stored in a directory.
+		:param directory: The directory to store the models in. It will be
+		created if it doesn't exist yet.
+		"""
+		self._directory = directory
+		self._models = {} #For each partition, a dictionary with the evaluation keys, the settings, their multipliers, their fingerprints and their errors.
+		if not os.path.exists(self._directory):
+			os.mkdir(self._directory)
+		for file_name in os.listdir(self._directory):
+			if not file_name.endswith(".npz"):
+				continue
+			file_path = os.path.join(self._directory, file_name)
+			try:
+				partition, model = self._load(file_path)
+			except (OSError, ValueError, KeyError) as e:
+				UM.Logger.Logger.log("w", "Unable to load trained model {file_path}: {err}".format(file_path=file_path, err=str(e)))
+				continue
+			self._models[partition] = model
+
+	@staticmethod
+	def _load(file_path):
+		"""
+		Reads a model from disk.
+		:param file_path: The `.npz` file to read.
+		:return: A tuple of the partition and the model of that partition.
+		"""
+		with numpy.load(file_path) as data:
+			partition = tuple(json.loads(str(data["partition"])))
+			return partition, {
+				"evaluation_keys": data["evaluation_keys"].tolist(),
+				"highest_exponent": int(data["highest_exponent"]),
+				"cross_terms": bool(data["cross_terms"]),
+				"settings": data["settings"].tolist(),
+				"options": json.loads(str(data["options"])) if "options" in data else [None] * len(data["settings"]), #Older models had no categorical settings.
+				"coefficients": data["coefficients"],
+				"fingerprints": data["fingerprints"].tolist(),
+				"errors": data["errors"].tolist() if "errors" in data else [float("nan")] * len(data["settings"]) #Older models had no errors.
+			}
+
+	@staticmethod
+	def fingerprint_evaluations(evaluations, highest_exponent, cross_terms):
+		"""
+		Creates a fingerprint of the evaluations that settings are trained on,
+		and the way they are trained.
+
+		The result is to be passed on to `fingerprint_setting`.
+		:param evaluations: The evaluation matrix that is trained on.
+		:param highest_exponent: The highest exponent of the polynomials.
+		:param cross_terms: Whether cross terms are used in the polynomials.
+		:return: A fingerprint of the evaluations.
+		"""
+		digest = hashlib.sha1()
+		digest.update(json.dumps([evaluations.keys, highest_exponent, cross_terms]).encode("utf-8"))
+		digest.update(evaluations.values.tobytes())
+		digest.update(evaluations.missing.tobytes())
+		return digest.hexdigest()
+
+	@staticmethod
+	def fingerprint_setting(evaluations_fingerprint, values):
+		"""
+		Creates a fingerprint of the training data of a setting.
+		:param evaluations_fingerprint: The fingerprint of the evaluations, as
+		produced by `fingerprint_evaluations`.
+		:param values: The values of the setting in each print.
+		:return: A fingerprint of the training data of the setting.
+		"""
+		digest = hashlib.sha1(evaluations_fingerprint.encode("utf-8"))
+		digest.update(json.dumps(values).encode("utf-8"))
+		return digest.hexdigest()
+
+	def get(self, partition):
+		"""
+		Gets the stored model of a partition.
+		:param partition: A tuple of the printer type, nozzle and material.
+		:return: A dictionary with the keys `evaluation_keys` (the evaluation
+		entry of each predictor), `highest_exponent`, `cross_terms`, `settings`
+		(the setting of each column of multipliers), `options` (the option of a
+		categorical setting that each column rates, or `None`), `coefficients`
+		(the multipliers, with one column for each setting or option),
+		`fingerprints` (the fingerprint of the setting of each column) and
+		`errors` (the error of the setting of each column on held-out prints,
+		or NaN if unknown). If there is no model for the partition, `None` is
+		returned.
+		"""
+		return self._models.get(partition)
+
+	def fingerprints(self, partition):
+		"""
+		Gets the fingerprints of the training data of all stored settings of a
+		partition.
+		:param partition: A tuple of the printer type, nozzle and material.
+		:return: A dictionary mapping settings to their fingerprints.
+		"""
+		model = self._models.get(partition)
+		if model is None:
+			return {}
+		return dict(zip(model["settings"], model["fingerprints"]))
+
+	def errors(self, partition):
+		"""
+		Gets the errors of all stored settings of a partition on the prints
+		that were held out while training.
+		:param partition: A tuple of the printer type, nozzle and material.
+		:return: A dictionary mapping settings to their mean squared error, or
+		NaN if it's unknown.
+		"""
+		model = self._models.get(partition)
+		if model is None:
+			return {}
+		return dict(zip(model["settings"], model["errors"]))
+
+	def store(self, partition, evaluation_keys, highest_exponent, cross_terms, multipliers, fingerprints, options=None, errors=None):
+		"""
+		Stores newly trained settings of a partition.
+
+		The settings that were not trained again are kept, unless the model
+		was trained on different evaluation entries or with a different
+		polynomial, since then the old multipliers no longer fit.
+		:param partition: A tuple of the printer type, nozzle and material.
+		:param evaluation_keys: The evaluation entry of each predictor.
+		:param highest_exponent: The highest exponent of the polynomials.
+		:param cross_terms: Whether cross terms are used in the polynomials.
+		:param multipliers: A dictionary mapping each newly trained setting to
+		its multipliers. Categorical settings have a column of multipliers for
+		each option.
+		:param fingerprints: A dictionary mapping each newly trained setting to
+		the fingerprint of its training data.
+		:param options: A dictionary mapping each newly trained categorical
+		setting to the option of each column of its multipliers.
+		:param errors: A dictionary mapping each newly trained setting to its
+		error on held-out prints.
+		"""
+		if options is None:
+			options = {}
+		if errors is None:
+			errors = {}
+		combined = {} #For each setting, the columns of multipliers, the option of each column, the fingerprint and the error.
+		old_model = self._models.get(partition)
+		if old_model is not None and old_model["evaluation_keys"] == evaluation_keys and old_model["highest_exponent"] == highest_exponent and old_model["cross_terms"] == cross_terms:
+			for index, setting in enumerate(old_model["settings"]):
+				columns, column_options, _, _ = combined.get(setting, ([], [], None, None))
+				combined[setting] = (columns + [old_model["coefficients"][:, index]], column_options + [old_model["options"][index]], old_model["fingerprints"][index], old_model["errors"][index])
+		for setting, setting_multipliers in multipliers.items():
+			setting_multipliers = numpy.asarray(setting_multipliers)
+			error = float(errors.get(setting, float("nan")))
+			if setting in options:
+				combined[setting] = (list(setting_multipliers.transpose()), list(options[setting]), fingerprints[setting], error)
+			else:
+				combined[setting] = ([setting_multipliers], [None], fingerprints[setting], error)
+		if not combined:
+			return
+
+		settings = sorted(combined)
+		model = {
+			"evaluation_keys": list(evaluation_keys),
+			"highest_exponent": highest_exponent,
+			"cross_terms": cross_terms,
+			"settings": [setting for setting in settings for _ in combined[setting][0]],
+			"options": [option for setting in settings for option in combined[setting][1]],
+			"coefficients": numpy.stack([column for setting in settings for column in combined[setting][0]], axis=1),
+			"fingerprints": [combined[setting][2] for setting in settings for _ in combined[setting][0]],
+			"errors": [combined[setting][3] for setting in settings for _ in combined[setting][0]]
+		}
+		self._models[partition] = model
+		self._save(partition, model)
+
+	def import_model(self, file_path):
+		"""
+		Imports a model that was trained elsewhere, for instance with the
+		headless training script.
+
+		The imported model replaces the model of its partition entirely.
+		:param file_path: The `.npz` file of the model.
+		:return: The partition of the model, or `None` if it couldn't be
+		imported.
+		"""
+		try:
+			partition, model = self._load(file_path)
+		except (OSError, ValueError, KeyError) as e:
+			UM.Logger.Logger.log("e", "Unable to import trained model {file_path}: {err}".format(file_path=file_path, err=str(e)))
+			return None
+		self._models[partition] = model
+		self._save(partition, model)
+		return partition
+
+	def _save(self, partition, model):
+		"""
+		Writes the model of a partition to disk.
+		:param partition: A tuple of the printer type, nozzle and material.
+		:param model: The model to write.
+		"""
+		file_name = hashlib.sha1(json.dumps(partition).encode("utf-8")).hexdigest() + ".npz"
+		file_path = os.path.join(self._directory, file_name)
+		temporary_path = file_path + ".tmp"
+		try:
+			with open(temporary_path, "wb") as f:
+				numpy.savez(f,
+					partition=numpy.array(json.dumps(partition)),
+					evaluation_keys=numpy.array(model["evaluation_keys"], dtype=str),
+					highest_exponent=numpy.array(model["highest_exponent"]),
+					cross_terms=numpy.array(model["cross_terms"]),
+					settings=numpy.array(model["settings"], dtype=str),
+					options=numpy.array(json.dumps(model["options"])), #May contain None, so not a plain array of strings.
+					coefficients=model["coefficients"],
+					fingerprints=numpy.array(model["fingerprints"], dtype=str),
+					errors=numpy.array(model["errors"], dtype=float)
+				)
+			os.replace(temporary_path, file_path)
+		except OSError as e:
+			UM.Logger.Logger.log("e", "Unable to save trained model: {err}".format(err=str(e)))
\ No newline at end of file
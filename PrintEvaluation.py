@@ -4,7 +4,9 @@
 import cura.CuraApplication #Various hooks into Cura.
 import cura.Settings.ExtruderManager #To get the currently active extruder.
 import cura.Stages.CuraStage #We're implementing a Cura stage.
+import hashlib #To create a hash of the scene.
 import os.path #To find the QML components.
+import PyQt5.QtCore #To delay saving the evaluation.
 import PyQt5.QtQml #To register QML components with the QML engine.
 import UM.PluginRegistry #To find resources in the plug-in folder.
 import UM.Scene.Iterator.DepthFirstIterator #To get the scene nodes for the scene hash.
@@ -13,8 +15,10 @@ import UM.Settings.ContainerStack #To load the list of intents as settings.
 import UM.Settings.DefinitionContainer #To load the list of intents as setting definitions.
 import UM.Settings.InstanceContainer #To allow changing the intents.
 
-from . import Print #To create a new entry in the prints database.
+from . import Print #To expose prints to QML.
+from . import PrintRecord #To create a new entry in the prints database.
 from . import Prints #To add prints to the database.
+from . import Statistics #To measure how long saving takes.
 
 class PrintEvaluation(cura.Stages.CuraStage.CuraStage):
 	"""
@@ -26,6 +30,14 @@ class PrintEvaluation(cura.Stages.CuraStage.CuraStage):
 		super().__init__(parent)
 
 		self.intents_stack = None
+		self._leaf_keys_cache = {} #For each pair of machine and extruder definition IDs, the keys of the settings without children.
+
+		#Changes to the evaluation are saved after the user stops editing for a moment, rather than on every keystroke.
+		self._pending_save = None #The print whose evaluation was changed but not saved yet.
+		self._save_timer = PyQt5.QtCore.QTimer()
+		self._save_timer.setSingleShot(True)
+		self._save_timer.setInterval(1000)
+		self._save_timer.timeout.connect(self._save_pending_evaluation)
 
 		#Interoperatability with all the signals going 'round in this place.
 		application = cura.CuraApplication.CuraApplication.getInstance()
@@ -33,6 +45,7 @@ class PrintEvaluation(cura.Stages.CuraStage.CuraStage):
 		application.engineCreatedSignal.connect(self._register_qml_types)
 		application.getOutputDeviceManager().writeStarted.connect(self.save_print)
 		application.initializationFinished.connect(self._register_container)
+		application.aboutToQuit.connect(self._save_pending_evaluation)
 
 	def save_print(self, output_device):
 		"""
@@ -44,30 +57,47 @@ class PrintEvaluation(cura.Stages.CuraStage.CuraStage):
 		:param output_device: The output device that was used to print the
 		print. This is not used, since we only need the metadata of the print.
 		"""
-		this_print = Print.Print()
-
-		application = cura.CuraApplication.CuraApplication.getInstance()
-		print_info = application.getPrintInformation()
-		this_print.set_name(print_info.jobName)
-		this_print.set_printer_type(application.getGlobalContainerStack().definition.getId())
-		this_print.evaluation()["print_time"] = sum((int(d) for d in print_info.printTimes().values())) #We already fill this information in beforehand from the estimate that Cura gives.
-		scene_hash = ""
-		for node in UM.Scene.Iterator.DepthFirstIterator.DepthFirstIterator(application.getController().getScene().getRoot()):
-			if node.getMeshData():
-				scene_hash += node.getMeshData().getHash()
-		this_print.set_model_hash(scene_hash)
-		this_print.set_evaluated_extruder(cura.Settings.ExtruderManager.ExtruderManager.getInstance().activeExtruderIndex)
-		for extruder_index in application.getGlobalContainerStack().extruders:
-			extruder_train = application.getGlobalContainerStack().extruders[extruder_index]
-			extruder_index = int(extruder_index)
-			settings = {}
-			for setting_key in extruder_train.getAllKeys():
-				if not extruder_train.getProperty(setting_key, "children"):
-					settings[setting_key] = extruder_train.getProperty(setting_key, "value")
-			settings["nozzle"] = extruder_train.variant.getId()
-			settings["material"] = extruder_train.material.getId()
-			this_print.add_extruder(extruder_index, settings)
-		Prints.Prints.get_instance().add_print(this_print)
+		with Statistics.Statistics.get_instance().timer("save_print"): #This delays the print, so it must be fast.
+			this_print = PrintRecord.PrintRecord()
+
+			application = cura.CuraApplication.CuraApplication.getInstance()
+			with this_print.batch_update(): #Save only once, after all fields are filled in.
+				print_info = application.getPrintInformation()
+				this_print.set_name(print_info.jobName)
+				global_stack = application.getGlobalContainerStack()
+				this_print.set_printer_type(global_stack.definition.getId())
+				this_print.evaluation()["print_time"] = sum((int(d) for d in print_info.printTimes().values())) #We already fill this information in beforehand from the estimate that Cura gives.
+				#Older versions stored the concatenated mesh hashes, without prefix. PrintRecord translates those to this digest when loading, so the mesh hashes must be hashed in turn, without separators.
+				scene_hash = hashlib.sha256() #Fixed size, regardless of how many models are in the scene.
+				for node in UM.Scene.Iterator.DepthFirstIterator.DepthFirstIterator(application.getController().getScene().getRoot()):
+					if node.getMeshData():
+						scene_hash.update(node.getMeshData().getHash().encode("utf-8"))
+				this_print.set_model_hash(PrintRecord.PrintRecord.model_hash_prefix + scene_hash.hexdigest())
+				this_print.set_evaluated_extruder(cura.Settings.ExtruderManager.ExtruderManager.getInstance().activeExtruderIndex)
+				for extruder_index in global_stack.extruders:
+					extruder_train = global_stack.extruders[extruder_index]
+					extruder_index = int(extruder_index)
+					settings = {setting_key: extruder_train.getProperty(setting_key, "value") for setting_key in self._leaf_keys(global_stack, extruder_train)}
+					settings["nozzle"] = extruder_train.variant.getId()
+					settings["material"] = extruder_train.material.getId()
+					this_print.add_extruder(extruder_index, settings)
+			Prints.Prints.get_instance().add_print(this_print)
+
+	def _leaf_keys(self, global_stack, extruder_train):
+		"""
+		Gets the keys of the settings that have no children, and so are
+		actually used to slice.
+
+		Which settings are leaves only depends on the definitions, so this is
+		cached per machine and extruder definition.
+		:param global_stack: The global stack of the printer.
+		:param extruder_train: The extruder stack to get the leaf settings of.
+		:return: A list of setting keys.
+		"""
+		definitions = (global_stack.definition.getId(), extruder_train.definition.getId())
+		if definitions not in self._leaf_keys_cache:
+			self._leaf_keys_cache[definitions] = [setting_key for setting_key in extruder_train.getAllKeys() if not extruder_train.getProperty(setting_key, "children")]
+		return self._leaf_keys_cache[definitions]
 
 	def _add_sidebar_panel(self):
 		"""
@@ -86,26 +116,57 @@ class PrintEvaluation(cura.Stages.CuraStage.CuraStage):
 		This copies the evaluation within the selected print into the setting
 		stack with intents.
 		"""
+		self._save_pending_evaluation() #Don't lose the last changes to the previously selected print.
+
 		prnt = Prints.Prints.get_instance().selected_print
-		self.intents_stack.getTop().clear()
-		for intent in prnt.evaluation():
-			self.intents_stack.getTop().setProperty(intent, "value", prnt.evaluation()[intent])
+		self.intents_stack.getTop().clear() #This triggers a property change for every intent, but `_on_evaluation_changed` recognises that nothing changed in the print.
+		if prnt is not None:
+			evaluation = prnt.evaluation()
+			for intent in evaluation:
+				self.intents_stack.getTop().setProperty(intent, "value", evaluation[intent])
 
 	def _on_evaluation_changed(self, key, property):
 		"""
 		Triggered when the user changes one of the evaluation entries.
 
 		When this happens, we must update the evaluation in the currently
-		active print entry.
+		active print entry. The print is saved after a short delay, so that a
+		burst of changes results in a single save.
+
+		Loading a print into the stack triggers this too, possibly later since
+		the stack collects the changes of its containers. Those changes are
+		recognised because the value in the stack is the same as in the print,
+		or because the entry is neither filled in for the print nor set in the
+		stack.
 		:param key: The entry that was changed.
 		:param property: The property of the setting that was changed.
 		Normally this can only be the "value" property.
 		"""
 		if property != "value":
 			return
-		prnt = Prints.Prints.get_instance().selected_print
-		prnt.evaluation()[key] = self.intents_stack.getProperty(key, "value") #Update this new property in the current print.
-		prnt.save()
+		selected_print = Prints.Prints.get_instance().selected_print
+		if selected_print is None:
+			return
+		prnt = selected_print.record
+		value = self.intents_stack.getProperty(key, "value")
+		if value == prnt.evaluation().get(key):
+			return #Not an edit. The print was just loaded into the stack.
+		if key not in prnt.evaluation() and self.intents_stack.getTop().getProperty(key, "value") is None:
+			return #Cleared when loading a print that doesn't have this entry.
+		old_evaluation = dict(prnt.evaluation())
+		prnt.evaluation()[key] = value #Update this new property in the current print.
+		Prints.Prints.get_instance().evaluation_changed(prnt, old_evaluation)
+		self._pending_save = prnt
+		self._save_timer.start() #Restarts the timer if it was already running.
+
+	def _save_pending_evaluation(self):
+		"""
+		Saves the print whose evaluation was changed, if any.
+		"""
+		self._save_timer.stop()
+		if self._pending_save is not None:
+			self._pending_save.save()
+			self._pending_save = None
 
 	def _register_container(self):
 		"""
@@ -0,0 +1,131 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+import os.path #To find the prints and baselines of the other installation.
+import UM.Logger
+
+from . import Baselines #To be able to read the settings of the other installation.
+from . import JsonPrintStore #To read the prints of the other installation.
+from . import PrintRecord #To create renamed copies of prints.
+from . import SqlitePrintStore #To read the prints of the other installation.
+
+class PrintMerger:
+	"""
+	Merges prints of another installation of Cura into our list of prints.
+
+	Prints are the same if their content hash is the same: the hash of their
+	time and date, name, model hash, printer type and settings. Since the time
+	and date and name are part of the hash, the prints are indexed by those,
+	and the content hashes of our prints are only computed for the few
+	incoming prints that have the same time and date and name. That keeps the
+	cost of a merge linear in the number of incoming prints.
+
+	If the same print was evaluated on both installations, the evaluations are
+	combined. Where both filled in the same entry differently, the larger
+	value wins. That way the result doesn't depend on which installation is
+	merged into which, and merging twice doesn't change anything. If a
+	different print has the same time and date and name, the incoming print is
+	kept too, with the start of its content hash appended to its name.
+
+	The merger only decides what changes. Storing them is left to the caller,
+	so that it can be done in one batch.
+	"""
+
+	def __init__(self, prints):
+		"""
+		Prepares to merge prints into a list of prints.
+		:param prints: Our prints.
+		"""
+		self._index = {(prnt.time_date, prnt.name): prnt for prnt in prints} #Prints by the time and date and name they're stored under.
+		self._hashes = {} #Content hashes of the prints in the index that were needed so far, by their time and date and name.
+		self._pending = set() #The time and date and name of the prints that were added or changed, so they're stored only once.
+
+		self.added = [] #After merging, the incoming prints that we didn't have yet.
+		self.changed = [] #After merging, our prints whose evaluation was completed with an incoming one.
+
+	@staticmethod
+	def load(data_directory):
+		"""
+		Loads the prints of another installation of Cura.
+
+		The baselines of that installation are copied to ours first, so that
+		the settings of its prints can be read.
+		:param data_directory: The data directory of the other installation.
+		:return: A list of prints.
+		"""
+		Baselines.Baselines.get_instance().import_from(os.path.join(data_directory, "r2d2_baselines"))
+		database_path = os.path.join(data_directory, "print_evaluations.db")
+		if os.path.exists(database_path):
+			return SqlitePrintStore.SqlitePrintStore(database_path).load_all()
+		directory = os.path.join(data_directory, "print_evaluations")
+		if os.path.isdir(directory):
+			return JsonPrintStore.JsonPrintStore(directory).load_all()
+		UM.Logger.Logger.log("w", "There are no prints in {data_directory} to merge.".format(data_directory=data_directory))
+		return []
+
+	def merge(self, incoming):
+		"""
+		Merges prints into our prints.
+
+		Afterwards, `added` and `changed` contain the prints that need to be
+		stored.
+		:param incoming: The prints to merge.
+		"""
+		for prnt in sorted(incoming, key=lambda prnt: (prnt.time_date, prnt.name)): #In a fixed order, so that renamed prints always get the same name.
+			key = (prnt.time_date, prnt.name)
+			content_hash = prnt.content_hash()
+			if key in self._index and self._content_hash(key) != content_hash:
+				#A different print with the same time and date and name.
+				document = prnt.serialise()
+				document["name"] = "{name} ({content_hash})".format(name=prnt.name, content_hash=content_hash[:8])
+				prnt = PrintRecord.PrintRecord.deserialise(document)
+				key = (prnt.time_date, prnt.name)
+				content_hash = prnt.content_hash()
+				if key in self._index and self._content_hash(key) != content_hash:
+					UM.Logger.Logger.log("w", "Unable to merge print {name} of {time_date}: Another print already has its name.".format(name=prnt.name, time_date=prnt.time_date))
+					continue
+
+			if key not in self._index:
+				self._index[key] = prnt
+				self._hashes[key] = content_hash
+				self._pending.add(key)
+				self.added.append(prnt)
+				continue
+			ours = self._index[key]
+			if self._merge_evaluation(ours.evaluation(), prnt.evaluation()) and key not in self._pending:
+				self._pending.add(key)
+				self.changed.append(ours)
+
+	def _content_hash(self, key):
+		"""
+		Gets the content hash of one of our prints, computing it only once.
+		:param key: The time and date and name of the print.
+		:return: The content hash of the print.
+		"""
+		if key not in self._hashes:
+			self._hashes[key] = self._index[key].content_hash()
+		return self._hashes[key]
+
+	@staticmethod
+	def _merge_evaluation(ours, theirs):
+		"""
+		Completes an evaluation with the entries of another evaluation of the
+		same print.
+		:param ours: The evaluation to complete. It's changed in place.
+		:param theirs: The evaluation to complete it with.
+		:return: Whether our evaluation changed.
+		"""
+		changed = False
+		for key, value in sorted(theirs.items()):
+			if key in ours:
+				if ours[key] == value:
+					continue
+				try:
+					if value < ours[key]:
+						continue
+				except TypeError: #Values of different types. Still choose the same one each time.
+					if str(value) < str(ours[key]):
+						continue
+			ours[key] = value
+			changed = True
+		return changed
\ No newline at end of file
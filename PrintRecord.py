@@ -0,0 +1,375 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+import contextlib #To batch changes to a print into a single save.
+import datetime #To get the current time and date when creating a new print.
+import hashlib #To recognise the same print on different installations.
+import json #To hash the settings.
+
+from . import Baselines #To store the settings compactly.
+from . import ExtruderSettings #To create empty extruders.
+from . import PrintStore #To save this print to disk.
+from . import Statistics #To count how often prints are written.
+
+class PrintRecord:
+	"""
+	Represents a previously made print.
+
+	This is a plain record, so that the history of prints takes little memory
+	and is fast to load. To show a print in QML, it is wrapped in a `Print`
+	object.
+	"""
+
+	model_hash_prefix = "sha256:" #Model hashes in the current form start with this, so that the hashes of older versions can be recognised.
+
+	__slots__ = ("_name", "_time_date", "_printer_type", "_evaluated_extruder", "_model_hash", "_extruders", "_evaluation", "_loader", "_header", "_stored_key", "_dirty", "_batch_depth")
+
+	def __init__(self):
+		"""
+		Initialises the fields of this print.
+		"""
+		self._name = "unknown"
+		self._time_date = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+		self._printer_type = "unknown"
+		self._evaluated_extruder = 0
+		self._model_hash = 0
+		self._extruders = [] #For each extruder, the settings containing "nozzle", "material", and all settings for that extruder (including global settings), stored relative to a baseline.
+		self._evaluation = {} #All known evaluation entries. Evaluation entries that are unknown are left out.
+
+		self._loader = None #If the extruders and evaluation are not loaded yet, a function that loads them.
+		self._header = None #If the extruders and evaluation are not loaded yet, the header this print was created from.
+
+		self._stored_key = None #The time and date and name that this print is currently stored under, if it's stored at all.
+		self._dirty = False #Whether there are changes that are not saved yet.
+		self._batch_depth = 0 #How many batches of changes are currently open. Saving is deferred until they're all closed.
+
+	@staticmethod
+	def deserialise(document):
+		"""
+		Creates a print from its serialised form.
+		:param document: A dictionary as produced by `serialise`.
+		:return: A print with the data of that dictionary.
+		"""
+		result = PrintRecord()
+		#Careful not to use the setters for these because that will trigger a save, which might overwrite the stored print.
+		result._name = document["name"]
+		result._time_date = document["time_date"]
+		result._printer_type = document["printer_type"]
+		result._evaluated_extruder = document["evaluated_extruder"]
+		result._model_hash = PrintRecord._migrate_model_hash(document["model_hash"])
+		result._extruders = [Baselines.Baselines.get_instance().decode(extruder, result._printer_type) for extruder in document["extruders"]]
+		result._evaluation = document["evaluation"]
+		result._stored_key = (result._time_date, result._name)
+
+		return result
+
+	@staticmethod
+	def deserialise_header(header, loader):
+		"""
+		Creates a print from its header only.
+
+		The extruders and evaluation of the print are loaded only once they are
+		needed.
+		:param header: A dictionary as produced by `header`.
+		:param loader: A function that loads the rest of the print. It must
+		return a dictionary as produced by `serialise`.
+		:return: A print with the data of that header.
+		"""
+		result = PrintRecord()
+		result._name = header["name"]
+		result._time_date = header["time_date"]
+		result._printer_type = header["printer_type"]
+		result._evaluated_extruder = header["evaluated_extruder"]
+		result._model_hash = PrintRecord._migrate_model_hash(header["model_hash"])
+		if result._model_hash != header["model_hash"]:
+			header = dict(header, model_hash=result._model_hash)
+		result._header = header
+		result._loader = loader
+		result._stored_key = (result._time_date, result._name)
+
+		return result
+
+	@staticmethod
+	def _migrate_model_hash(model_hash):
+		"""
+		Translates a model hash of an older version to the current form.
+
+		Older versions stored the concatenation of the hashes of all meshes in
+		the scene. Now the model hash is a SHA-256 digest that is updated with
+		each of those mesh hashes in turn, which is the same as the digest of
+		their concatenation. So old model hashes translate exactly, and prints
+		of the same build plate keep matching. The current form starts with
+		`model_hash_prefix`. Any other string is of an older version, whatever
+		it looks like, since the hash of a single mesh is a SHA-256 digest as
+		well.
+		:param model_hash: The model hash as it was stored.
+		:return: The model hash in the current form.
+		"""
+		if type(model_hash) is not str or model_hash.startswith(PrintRecord.model_hash_prefix):
+			return model_hash
+		return PrintRecord.model_hash_prefix + hashlib.sha256(model_hash.encode("utf-8")).hexdigest()
+
+	def is_loaded(self):
+		"""
+		Whether the extruders and evaluation of this print are in memory.
+		:return: `True` if they are loaded, or `False` if only the header is.
+		"""
+		return self._loader is None
+
+	def _ensure_loaded(self):
+		"""
+		Loads the extruders and evaluation of this print if they were not
+		loaded yet.
+		"""
+		if self._loader is None:
+			return
+		document = self._loader()
+		self._extruders = [Baselines.Baselines.get_instance().decode(extruder, self._printer_type) for extruder in document["extruders"]]
+		self._evaluation = document["evaluation"]
+		self._loader = None
+		self._header = None
+
+	def set_name(self, new_name):
+		"""
+		Sets the print job name.
+		:param new_name: The new print job name.
+		"""
+		self._name = new_name
+		self.save() #The name identifies the print in the store, so this moves it.
+
+	@property
+	def name(self):
+		"""
+		The print job name.
+		:return: The print job name.
+		"""
+		return self._name
+
+	def set_time_date(self, new_time_date):
+		"""
+		Sets the time and date that the print was made at.
+		:param new_time_date: The new time and date to remember.
+		"""
+		self._time_date = new_time_date
+		self.save() #The time and date identify the print in the store, so this moves it.
+
+	@property
+	def time_date(self):
+		"""
+		The time and date that the print was made at.
+		:return: The time and date that the print was made at.
+		"""
+		return self._time_date
+
+	def set_printer_type(self, new_printer_type):
+		"""
+		Sets the printer type that was used (definition ID).
+		:param new_printer_type: The type of printer that was used.
+		"""
+		self._printer_type = new_printer_type
+		self.save()
+
+	@property
+	def printer_type(self):
+		"""
+		The type of printer that was used (definition ID).
+		:return: The type of printer that was used.
+		"""
+		return self._printer_type
+
+	def set_model_hash(self, new_model_hash):
+		"""
+		Sets the hash of the scene.
+		:param new_model_hash: The alleged hash of the scene that was printed.
+		"""
+		self._model_hash = new_model_hash
+		self.save()
+
+	@property
+	def model_hash(self):
+		"""
+		A hash of all models in the scene (after transformation).
+
+		This way the print time can be minimised as long as we have multiple
+		prints with exactly the same build plate.
+		:return: A hash of all models in the scene.
+		"""
+		return self._model_hash
+
+	def set_evaluated_extruder(self, new_evaluated_extruder):
+		"""
+		Sets the extruder to evaluate.
+		:param new_evaluated_extruder: The extruder to evaluate.
+		"""
+		self._evaluated_extruder = new_evaluated_extruder
+		self.save()
+
+	@property
+	def evaluated_extruder(self):
+		"""
+		The extruder that the evaluation is about.
+		:return: An extruder.
+		"""
+		return self._evaluated_extruder
+
+	def add_extruder(self, extruder_nr, new_extruder):
+		"""
+		Adds an extruder to the print.
+		:param extruder_nr: The position of this extruder.
+		:param new_extruder: A dictionary containing all settings for that
+		extruder in addition to "nozzle" and "material, specifying the nozzle
+		and material type that were used for the print in that extruder.
+		"""
+		self._ensure_loaded()
+		while len(self._extruders) <= extruder_nr:
+			self._extruders.append(ExtruderSettings.ExtruderSettings())
+		self._extruders[extruder_nr] = Baselines.Baselines.get_instance().encode(self._printer_type, new_extruder) #Set the printer type first, so that it's stored relative to the correct baseline.
+		self.save()
+
+	def extruder(self, extruder):
+		"""
+		Get the settings that were used for a particular extruder.
+
+		This contains all settings, per-extruder or global. In addition, it
+		contains two extra "settings": nozzle and material, indicating
+		respectively which nozzle was used and which material was used.
+		:param extruder: The extruder to get the settings of.
+		:return: A read-only dictionary containing all settings used for that
+		extruder.
+		"""
+		self._ensure_loaded()
+		return self._extruders[extruder]
+
+	def evaluated_extruder_settings(self):
+		"""
+		Short-hand to get the settings that were used for the evaluated
+		extruder.
+		:return: A read-only dictionary containing all settings used for the
+		extruder that was evaluated.
+		"""
+		self._ensure_loaded()
+		return self._extruders[self._evaluated_extruder]
+
+	def evaluation(self):
+		"""
+		The evaluation that was filled in for the print.
+		:return: A dictionary containing the evaluation entries that were
+		submitted for the print, if any.
+		"""
+		self._ensure_loaded()
+		return self._evaluation
+
+	def evaluated_nozzle(self):
+		"""
+		The nozzle that was used in the evaluated extruder.
+
+		This doesn't need to load the extruders.
+		:return: The ID of the nozzle, or `None` if it's not known.
+		"""
+		return self.header()["nozzle"]
+
+	def evaluated_material(self):
+		"""
+		The material that was used in the evaluated extruder.
+
+		This doesn't need to load the extruders.
+		:return: The ID of the material, or `None` if it's not known.
+		"""
+		return self.header()["material"]
+
+	def header(self):
+		"""
+		Gets a compact summary of this print, containing everything needed to
+		list and filter it but without the extruders and evaluation.
+		:return: A dictionary containing the header fields of this print.
+		"""
+		if self._header is not None:
+			return self._header
+		extruders = self._extruders
+		evaluated_settings = extruders[self._evaluated_extruder] if self._evaluated_extruder < len(extruders) else {} #The extruders may not be added yet.
+		return {
+			"name": self._name,
+			"time_date": self._time_date,
+			"printer_type": self._printer_type,
+			"evaluated_extruder": self._evaluated_extruder,
+			"model_hash": self._model_hash,
+			"nozzle": evaluated_settings.get("nozzle"),
+			"material": evaluated_settings.get("material")
+		}
+
+	def content_hash(self):
+		"""
+		Gets a hash of the contents of this print, to recognise the same print
+		on different installations.
+
+		The hash covers the time and date, name, model hash, printer type and
+		settings of the print, but not its evaluation, since that may be filled
+		in differently on each installation.
+		:return: A hexadecimal hash.
+		"""
+		self._ensure_loaded()
+		contents = [self._time_date, self._name, self._model_hash, self._printer_type, [dict(extruder) for extruder in self._extruders]] #Not the serialised extruders, since those depend on the baselines of the installation.
+		return hashlib.sha1(json.dumps(contents, sort_keys=True).encode("utf-8")).hexdigest()
+
+	def serialise(self):
+		"""
+		Gets a representation of this print that can be stored.
+		:return: A dictionary containing all data of this print.
+		"""
+		self._ensure_loaded()
+		return {
+			"name": self._name,
+			"time_date": self._time_date,
+			"printer_type": self._printer_type,
+			"evaluated_extruder": self._evaluated_extruder,
+			"model_hash": self._model_hash,
+			"extruders": [extruder.serialise() for extruder in self._extruders],
+			"evaluation": self._evaluation
+		}
+
+	def save(self):
+		"""
+		Saves this print to disk.
+
+		This needs to be called whenever the print is modified. If a batch of
+		changes is open, the print is only saved once the batch closes.
+		"""
+		self._dirty = True
+		if self._batch_depth == 0:
+			self.flush()
+
+	@contextlib.contextmanager
+	def batch_update(self):
+		"""
+		Groups multiple changes to this print into a single save.
+
+		Use this as a context manager. All changes made within the context are
+		saved at once when the context exits. Batches may be nested, in which
+		case the outermost batch saves.
+		"""
+		self._batch_depth += 1
+		try:
+			yield self
+		finally:
+			self._batch_depth -= 1
+			if self._batch_depth == 0:
+				self.flush()
+
+	def flush(self):
+		"""
+		Saves this print to disk if it has changes that were not saved yet.
+
+		If the time and date or the name were changed since the last save, the
+		print is moved in the store.
+		"""
+		if not self._dirty:
+			return
+		store = PrintStore.PrintStore.get_instance()
+		new_key = (self._time_date, self._name)
+		with Statistics.Statistics.get_instance().timer("write_print"):
+			if self._stored_key is None or self._stored_key == new_key:
+				store.save(self)
+			else:
+				store.move(self, *self._stored_key)
+		self._stored_key = new_key
+		self._dirty = False
\ No newline at end of file
@@ -0,0 +1,189 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+import os.path #To find where to store the prints.
+import UM.Logger
+import UM.Preferences #To let the user choose the storage back-end.
+import UM.Resources #To find the data directory.
+
+class PrintStore:
+	"""
+	Stores prints persistently.
+
+	This is the interface that the storage back-ends implement. Which back-end
+	is used is configured with the `r2d2/print_store` preference. It can be
+	either `json`, storing each print in a separate JSON file, or `sqlite`,
+	storing all prints in a single indexed database.
+	"""
+
+	inst = None
+
+	@staticmethod
+	def get_instance():
+		"""
+		Get the configured storage back-end.
+
+		This implements the singleton pattern.
+
+		When the SQLite back-end is used for the first time, all prints that
+		were previously stored as JSON files are migrated to the database.
+		:return: An instance of the configured print store.
+		"""
+		if PrintStore.inst is None:
+			#Imported here because these modules depend on this module.
+			from . import JsonPrintStore
+			from . import SqlitePrintStore
+
+			preferences = UM.Preferences.Preferences.getInstance()
+			preferences.addPreference("r2d2/print_store", "json")
+			backend = preferences.getValue("r2d2/print_store")
+
+			data_path = UM.Resources.Resources.getDataStoragePath()
+			json_store = JsonPrintStore.JsonPrintStore(os.path.join(data_path, "print_evaluations"), os.path.join(data_path, "print_evaluations_index.json"))
+			if backend == "sqlite":
+				database_path = os.path.join(data_path, "print_evaluations.db")
+				is_new = not os.path.exists(database_path)
+				PrintStore.inst = SqlitePrintStore.SqlitePrintStore(database_path)
+				if is_new:
+					PrintStore.inst.migrate_from(json_store)
+			else:
+				if backend != "json":
+					UM.Logger.Logger.log("w", "Unknown print store {backend}. Using JSON files instead.".format(backend=backend))
+				PrintStore.inst = json_store
+		return PrintStore.inst
+
+	def load_all(self):
+		"""
+		Loads all prints in this store.
+		:return: A list of prints.
+		"""
+		raise NotImplementedError("This print store doesn't implement loading.")
+
+	def load_headers(self):
+		"""
+		Loads all prints in this store, but only their headers.
+
+		The extruders and evaluations of the prints are loaded when they are
+		first needed. Back-ends that can't load only the headers load the
+		complete prints.
+		:return: A list of prints.
+		"""
+		return self.load_all()
+
+	def query(self, printer_type=None, nozzle=None, material=None, since=None, until=None):
+		"""
+		Loads the prints that match certain criteria.
+
+		Each criterion that is left as `None` will not be filtered on.
+		:param printer_type: The definition ID of the printer that the prints
+		must be made with.
+		:param nozzle: The nozzle that the evaluated extruder must have used.
+		:param material: The material that the evaluated extruder must have
+		used.
+		:param since: The earliest time and date of the prints, inclusive.
+		:param until: The latest time and date of the prints, inclusive.
+		:return: A list of the matching prints, sorted by their time and date.
+		"""
+		raise NotImplementedError("This print store doesn't implement querying.")
+
+	def rescan(self):
+		"""
+		Finds the prints that were added, changed or removed by other programs
+		since the headers were loaded or last rescanned.
+
+		By default, stores don't notice changes by other programs.
+		:return: A tuple of two lists. The first contains the new and changed
+		prints. The second contains the time and date and name of the removed
+		and changed prints.
+		"""
+		return [], []
+
+	def watched_directory(self):
+		"""
+		Gets a directory that other programs may change the prints in, to
+		rescan when it changes.
+		:return: A directory, or `None` if there is nothing to watch.
+		"""
+		return None
+
+	def save(self, prnt):
+		"""
+		Saves a print to this store, overwriting the print with the same time
+		and date and name if it already exists.
+		:param prnt: The print to save.
+		"""
+		raise NotImplementedError("This print store doesn't implement saving.")
+
+	def save_all(self, prints):
+		"""
+		Saves many prints to this store at once.
+
+		Back-ends that can save in bulk override this to do so.
+		:param prints: The prints to save.
+		"""
+		for prnt in prints:
+			self.save(prnt)
+
+	def move(self, prnt, old_time_date, old_name):
+		"""
+		Saves a print that was previously stored under a different time and
+		date or name, and removes the old entry.
+
+		The new entry is saved before the old one is removed, so that the print
+		is not lost if this gets interrupted.
+		:param prnt: The print to save.
+		:param old_time_date: The time and date that the print was stored
+		under.
+		:param old_name: The name that the print was stored under.
+		"""
+		self.save(prnt)
+		self.remove(old_time_date, old_name)
+
+	def remove(self, time_date, name):
+		"""
+		Removes a print from this store, if it exists.
+		:param time_date: The time and date of the print to remove.
+		:param name: The name of the print to remove.
+		"""
+		raise NotImplementedError("This print store doesn't implement removing.")
+
+	def migrate_from(self, other_store):
+		"""
+		Copies all prints from a different store into this store.
+		:param other_store: The store to copy the prints from.
+		"""
+		prints = other_store.load_all()
+		UM.Logger.Logger.log("i", "Migrating {num_prints} prints to the new print store.".format(num_prints=len(prints)))
+		self.save_all(prints)
+
+	@staticmethod
+	def _matches(prnt, printer_type, nozzle, material, since, until):
+		"""
+		Tests whether a print matches the criteria of a query.
+
+		This is a fallback for back-ends that can't filter before loading the
+		prints.
+		:param prnt: The print to test.
+		:param printer_type: The printer the print must be made with, or `None`
+		to match any.
+		:param nozzle: The nozzle the print must be made with, or `None` to
+		match any.
+		:param material: The material the print must be made with, or `None` to
+		match any.
+		:param since: The earliest time and date of the print, or `None` to
+		match any.
+		:param until: The latest time and date of the print, or `None` to match
+		any.
+		:return: `True` if the print matches, or `False` if it doesn't.
+		"""
+		if printer_type is not None and prnt.printer_type != printer_type:
+			return False
+		if since is not None and prnt.time_date < since:
+			return False
+		if until is not None and prnt.time_date > until:
+			return False
+		if nozzle is not None and prnt.evaluated_nozzle() != nozzle:
+			return False
+		if material is not None and prnt.evaluated_material() != material:
+			return False
+		return True
\ No newline at end of file
@@ -1,21 +1,34 @@
 #Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
 #Copyright (C) 2018 Ghostkeeper
 
+import bisect #To keep the partitions sorted by time and date.
 import cura.CuraApplication #Various hooks into Cura.
 import cura.Settings.ExtruderManager #To get the currently active extruder.
 import cura.Settings.MachineManager #To get the currently active material and nozzle.
-import os #To find the previously saved prints on the disk.
+import json #To read the intents.
+import os.path #To find the intents.
 import PyQt5.QtCore
 import UM.Qt.ListModel #To expose a list to QML.
 import UM.Logger
-import UM.Resources #To find previously saved prints in the data directory.
+import UM.PluginRegistry #To find the intents.
 
-from . import LeastSquares #To train a polynomial model.
-from . import Print
+from . import Dataset #To export the prints for training without Cura.
+from . import ModelStore #To store the trained models.
+from . import Print #To expose the prints to QML.
+from . import PrintMerger #To merge the prints of other installations.
+from . import PrintStore #To find previously saved prints.
+from . import ProfileGenerator #To generate profiles from the trained models.
+from . import RecursiveLeastSquares #To update the model whenever a print is added.
+from . import SimilarityIndex #To find prints with similar settings.
+from . import Statistics #To measure where time is spent.
+from . import TrainJob #To train in the background.
 
 class Prints(UM.Qt.ListModel.ListModel):
 	"""
 	Displays a list of the prints that this system has previously made.
+
+	The prints are kept as `PrintRecord`s. The QObjects that QML needs are
+	only created for the prints that QML asks for.
 	"""
 
 	PrintRole = PyQt5.QtCore.Qt.UserRole + 1
@@ -30,23 +43,60 @@ class Prints(UM.Qt.ListModel.ListModel):
 		self.addRoleName(self.PrintRole, "print")
 
 		self.prints = [] #A list of all prints.
+		self._partitions = {} #For each combination of printer type, nozzle and material, a list of the prints made with it, sorted by time and date.
+		self._partition_times = {} #For each combination of printer type, nozzle and material, the time and date of each print in the partition, to search through.
+		self._current_partition = None #The combination of printer type, nozzle and material that is currently displayed.
+		self._online_models = {} #For each partition that was requested, a learner that is updated with every new print and evaluation.
+		self._similarity_indices = {} #For each partition that was requested, an index to find prints with similar settings.
+		self._intents = None #The keys of all intents, once they're loaded.
+		self._profile_generator = None #The model that profiles were last generated with, and the generator for it.
+		self._setting_properties_cache = (None, {}) #The configuration that setting properties were last requested for, and the properties of each setting.
+
+		self._wrappers = {} #For each print record that QML has asked for, the QObject that exposes it.
+		self._selected_print = None #The print that is currently selected, wrapped for QML.
 
-		self._selected_print = None #The print that is currently selected.
+		self._train_job = None #The background job that is currently training, if any.
+		self._training_partition = None #The combination of printer type, nozzle and material that is being trained for.
+		self._training_progress = 0 #Fraction of the current training that is completed.
 
 		#Link some signals to update the view at appropriate times.
 		application = cura.CuraApplication.CuraApplication.getInstance()
 		application.globalContainerStackChanged.connect(self._update)
 		application.getMachineManager().activeVariantChanged.connect(self._update)
 		application.getMachineManager().activeMaterialChanged.connect(self._update)
+
+		#Load all prints that were saved in previous sessions. Only their headers are loaded until the rest is needed.
+		statistics = Statistics.Statistics.get_instance()
+		with statistics.timer("load_prints"):
+			for prnt in PrintStore.PrintStore.get_instance().load_headers():
+				self.prints.append(prnt)
+				self._add_to_partition(prnt)
+		statistics.count("prints_loaded", len(self.prints))
 		self._update()
 
-		#Load all prints that were saved in previous sessions.
-		store_directory = os.path.join(UM.Resources.Resources.getDataStoragePath(), "print_evaluations")
-		if not os.path.exists(store_directory):
-			os.mkdir(store_directory) #Create if it didn't exist yet.
-		for file_name in os.listdir(os.path.join(UM.Resources.Resources.getDataStoragePath(), "print_evaluations")):
-			file_path = os.path.join(store_directory, file_name)
-			self.add_print(Print.Print.load(file_path))
+		#Pick up prints that other programs add, change or remove. The directory is watched, but changes within files are only noticed by polling.
+		self._rescan_timer = PyQt5.QtCore.QTimer(self) #Waits until the changes to the directory settle.
+		self._rescan_timer.setSingleShot(True)
+		self._rescan_timer.setInterval(500)
+		self._rescan_timer.timeout.connect(self._rescan)
+		self._poll_timer = PyQt5.QtCore.QTimer(self)
+		self._poll_timer.setInterval(30 * 1000)
+		self._poll_timer.timeout.connect(self._rescan)
+		self._watcher = None
+		watched_directory = PrintStore.PrintStore.get_instance().watched_directory()
+		if watched_directory is not None:
+			self._watcher = PyQt5.QtCore.QFileSystemWatcher([watched_directory], self)
+			self._watcher.directoryChanged.connect(self._rescan_timer.start)
+			self._poll_timer.start()
+
+		#Periodically report the statistics, if they are being gathered.
+		self._statistics_timer = PyQt5.QtCore.QTimer(self)
+		self._statistics_timer.setInterval(60 * 1000)
+		self._statistics_timer.timeout.connect(self._report_statistics)
+		if statistics.enabled:
+			self._statistics_timer.start()
+
+		ModelStore.ModelStore.get_instance() #Load the trained models right away, so they're ready to generate profiles with.
 
 	def add_print(self, print):
 		"""
@@ -54,12 +104,324 @@ class Prints(UM.Qt.ListModel.ListModel):
 		:param print: The print to add to the database.
 		"""
 		self.prints.append(print)
-		application = cura.CuraApplication.CuraApplication.getInstance()
-		if application.getGlobalContainerStack().definition.getId() == print.printer_type: #Only need to update if the print would currently be displayed.
-			active_extruder = cura.Settings.ExtruderManager.ExtruderManager.getInstance().getActiveExtruderStack()
-			evaluated_extruder = print.extruder(print.evaluated_extruder)
-			if active_extruder.variant.getId() == evaluated_extruder["nozzle"] and active_extruder.material.getId() == evaluated_extruder["material"]:
-				self._update()
+		position = self._add_to_partition(print)
+		online_model = self._online_models.get(self._partition_key(print))
+		if online_model is not None: #Keep the online model up to date. If there is none, it will include this print once it's created.
+			online_model.add(print.evaluation(), print.evaluated_extruder_settings())
+		similarity_index = self._similarity_indices.get(self._partition_key(print))
+		if similarity_index is not None:
+			similarity_index.add(print)
+		if self._partition_key(print) == self._current_partition: #Only need to update if the print would currently be displayed.
+			row = len(self._partitions[self._current_partition]) - 1 - position #The list is displayed newest first.
+			self.insertItem(row, {
+				"print": print
+			})
+
+	def data(self, index, role):
+		"""
+		Gets the data of an item in the list, for QML.
+
+		The prints are wrapped in a QObject the first time they are asked for.
+		:param index: The index of the item.
+		:param role: Which data of the item to get.
+		:return: The data of the item.
+		"""
+		value = super().data(index, role)
+		if role == self.PrintRole and value is not None:
+			return self.wrap(value)
+		return value
+
+	def wrap(self, prnt):
+		"""
+		Gets a QObject to expose a print to QML.
+
+		The same print always gets the same QObject, so that QML can compare
+		them.
+		:param prnt: The record of the print.
+		:return: A `Print` that wraps the record.
+		"""
+		if prnt not in self._wrappers:
+			wrapper = Print.Print(prnt, self) #Parented to this model, so that QML never holds on to a deleted object.
+			wrapper.time_date_changed.connect(lambda: self._time_date_changed(prnt))
+			self._wrappers[prnt] = wrapper
+		return self._wrappers[prnt]
+
+	def _time_date_changed(self, prnt):
+		"""
+		Moves a print to its new place in its partition after its time and
+		date was changed.
+		:param prnt: The print whose time and date was changed.
+		"""
+		key = self._partition_key(prnt)
+		partition = self._partitions.get(key, [])
+		old_position = next((position for position, other in enumerate(partition) if other is prnt), None) #Can't search by time and date, since that changed.
+		if old_position is None:
+			return
+		del partition[old_position]
+		del self._partition_times[key][old_position]
+		new_position = self._add_to_partition(prnt)
+		if key == self._current_partition and new_position != old_position: #The list is displayed newest first.
+			self.removeItem(len(partition) - 1 - old_position)
+			self.insertItem(len(partition) - 1 - new_position, {
+				"print": prnt
+			})
+
+	def _rescan(self):
+		"""
+		Updates the list of prints with the prints that other programs added,
+		changed or removed.
+
+		Only the partitions that changed are updated.
+		"""
+		with Statistics.Statistics.get_instance().timer("rescan"):
+			added, removed = PrintStore.PrintStore.get_instance().rescan()
+			if not added and not removed:
+				return
+			UM.Logger.Logger.log("i", "Found {num_added} new or changed prints and {num_removed} removed or changed prints.".format(num_added=len(added), num_removed=len(removed)))
+
+			changed_partitions = set()
+			removed = set(removed)
+			kept = []
+			for prnt in self.prints:
+				if (prnt.time_date, prnt.name) in removed:
+					changed_partitions.add(self._partition_key(prnt))
+					self._remove_from_partition(prnt)
+					if self._selected_print is not None and self._selected_print.record is prnt:
+						self.set_selected_print(None)
+					wrapper = self._wrappers.pop(prnt, None)
+					if wrapper is not None:
+						wrapper.deleteLater() #Not right away, since QML may still refer to it until the list is updated.
+				else:
+					kept.append(prnt)
+			self.prints = kept
+			for prnt in added:
+				self.prints.append(prnt)
+				self._add_to_partition(prnt)
+				changed_partitions.add(self._partition_key(prnt))
+
+			self._partitions_changed(changed_partitions)
+
+	@PyQt5.QtCore.pyqtSlot(str)
+	def merge(self, data_directory):
+		"""
+		Merges the prints of another installation of Cura into ours.
+
+		All new and changed prints are stored and added at once, and only the
+		partitions that changed are updated.
+		:param data_directory: The data directory of the other installation.
+		"""
+		statistics = Statistics.Statistics.get_instance()
+		with statistics.timer("merge"):
+			merger = PrintMerger.PrintMerger(self.prints)
+			merger.merge(PrintMerger.PrintMerger.load(data_directory))
+			UM.Logger.Logger.log("i", "Merged prints from {data_directory}: {num_added} new prints, {num_changed} completed evaluations.".format(data_directory=data_directory, num_added=len(merger.added), num_changed=len(merger.changed)))
+			statistics.count("prints_merged", len(merger.added))
+			if not merger.added and not merger.changed:
+				return
+
+			PrintStore.PrintStore.get_instance().save_all(merger.added + merger.changed)
+
+			changed_partitions = set(self._partition_key(prnt) for prnt in merger.changed)
+			for prnt in merger.added:
+				self.prints.append(prnt)
+				self._add_to_partition(prnt)
+				changed_partitions.add(self._partition_key(prnt))
+			self._partitions_changed(changed_partitions)
+			if self._selected_print is not None and self._selected_print.record in merger.changed:
+				self.selected_print_changed.emit() #Load its completed evaluation in the intents stack.
+
+	def _partitions_changed(self, partitions):
+		"""
+		Updates what depends on partitions whose prints changed in bulk.
+		:param partitions: The partitions whose prints changed.
+		"""
+		for partition in partitions:
+			self._online_models.pop(partition, None) #Will be created again from the new prints when needed.
+			self._similarity_indices.pop(partition, None)
+		if self._current_partition in partitions:
+			self._current_partition = None #Force showing the partition again.
+			self._update()
+
+	def evaluation_changed(self, prnt, old_evaluation):
+		"""
+		Updates the online model after the evaluation of a print was changed.
+		:param prnt: The print whose evaluation was changed.
+		:param old_evaluation: The evaluation of the print before the change.
+		"""
+		online_model = self._online_models.get(self._partition_key(prnt))
+		if online_model is None:
+			return
+		settings = prnt.evaluated_extruder_settings()
+		online_model.remove(old_evaluation, settings)
+		online_model.add(prnt.evaluation(), settings)
+
+	def online_model(self, partition):
+		"""
+		Gets a learner that is kept up to date with every print that is added
+		or evaluated, without needing to train again.
+
+		The learner is created from all prints of the partition the first time
+		it's requested. It models the numeric and boolean settings of all of
+		those prints, also those that only some of the prints have.
+		:param partition: A tuple of the printer type, nozzle and material.
+		:return: A recursive least squares learner, or `None` if there are no
+		prints in the partition.
+		"""
+		if partition not in self._online_models:
+			prints = self.partition(*partition)
+			if not prints:
+				return None
+			all_settings = [prnt.evaluated_extruder_settings() for prnt in prints]
+			numeric_settings = []
+			for setting in sorted(set().union(*(extruder_settings.keys() for extruder_settings in all_settings))): #Not every print needs to have every setting, for instance if it was added by a newer version of Cura.
+				present = [extruder_settings[setting] for extruder_settings in all_settings if extruder_settings.get(setting) is not None]
+				if present and all(type(value) in (bool, int, float) for value in present): #Like in `Dataset`, only settings that are numeric or boolean in every print that has them.
+					numeric_settings.append(setting)
+			online_model = RecursiveLeastSquares.RecursiveLeastSquares(self._intent_keys(), numeric_settings, TrainJob.TrainJob.highest_exponent, TrainJob.TrainJob.cross_terms)
+			online_model.add_all([prnt.evaluation() for prnt in prints], all_settings)
+			self._online_models[partition] = online_model
+		return self._online_models[partition]
+
+	def similarity_index(self, partition):
+		"""
+		Gets an index to find the prints of a partition with the most similar
+		settings.
+
+		The index is built the first time it's requested, and kept up to date
+		with every print that is added. Once it's stale, it's built again when
+		it's requested, rather than while adding a print.
+		:param partition: A tuple of the printer type, nozzle and material.
+		:return: A similarity index over the prints of the partition.
+		"""
+		if partition not in self._similarity_indices or self._similarity_indices[partition].is_stale():
+			with Statistics.Statistics.get_instance().timer("build_similarity_index"):
+				self._similarity_indices[partition] = SimilarityIndex.SimilarityIndex(self.partition(*partition))
+		return self._similarity_indices[partition]
+
+	@PyQt5.QtCore.pyqtSlot(int, result="QVariantList")
+	def similar_prints(self, count):
+		"""
+		Finds the past prints whose settings are most similar to those of the
+		selected print, for instance to pre-fill its evaluation from.
+
+		Prints of the same models come first.
+		:param count: How many prints to find at most.
+		:return: A list of prints, most similar first. If no print is
+		selected, this is empty.
+		"""
+		if self._selected_print is None:
+			return []
+		prnt = self._selected_print.record
+		with Statistics.Statistics.get_instance().timer("similar_prints"):
+			nearest = self.similarity_index(self._partition_key(prnt)).nearest(prnt.evaluated_extruder_settings(), count, prnt.model_hash, exclude=prnt)
+		return [self.wrap(similar) for similar, _ in nearest]
+
+	def partition(self, printer_type, nozzle, material):
+		"""
+		Gets the prints made with a certain combination of printer type, nozzle
+		and material.
+		:param printer_type: The definition ID of the printer.
+		:param nozzle: The ID of the nozzle that was used.
+		:param material: The ID of the material that was used.
+		:return: A list of prints, sorted by their time and date. This list
+		must not be modified.
+		"""
+		return self._partitions.get((printer_type, nozzle, material), [])
+
+	@staticmethod
+	def _partition_key(prnt):
+		"""
+		Gets the key of the partition that a print belongs to.
+		:param prnt: The print to get the partition of.
+		:return: A tuple of the printer type, nozzle and material of the print.
+		"""
+		return (prnt.printer_type, prnt.evaluated_nozzle(), prnt.evaluated_material())
+
+	@PyQt5.QtCore.pyqtSlot("QVariantMap", result="QVariantMap")
+	def generate_profile(self, intents):
+		"""
+		Generates setting values for the current printer, nozzle and material
+		from the intents of the user.
+
+		This uses the trained model of the current configuration. If it was
+		never trained, the online model is used instead.
+		:param intents: A dictionary of intents, in the same form as the
+		evaluation of a print.
+		:return: A dictionary mapping settings to their generated values. If
+		there is no model to generate with, this is empty.
+		"""
+		if self._current_partition is None:
+			return {}
+		model = ModelStore.ModelStore.get_instance().get(self._current_partition)
+		if model is None:
+			online_model = self.online_model(self._current_partition)
+			model = online_model.model() if online_model is not None else None
+			if model is None:
+				return {}
+		if self._profile_generator is None or self._profile_generator[0] is not model: #Both the model store and the online model return the same dictionary until the model changes.
+			self._profile_generator = (model, ProfileGenerator.ProfileGenerator(model, self._setting_properties(model["settings"])))
+		return self._profile_generator[1].generate(intents)
+
+	def _setting_properties(self, settings):
+		"""
+		Gets the type and bounds of settings in the active extruder.
+
+		These are cached per configuration, since asking the stack is slow.
+		:param settings: The settings to get the properties of.
+		:return: A dictionary mapping each setting to a dictionary with its
+		`type`, `minimum_value` and `maximum_value`.
+		"""
+		if self._setting_properties_cache[0] != self._current_partition:
+			self._setting_properties_cache = (self._current_partition, {})
+		cache = self._setting_properties_cache[1]
+		active_extruder = cura.Settings.ExtruderManager.ExtruderManager.getInstance().getActiveExtruderStack()
+		for setting in settings:
+			if setting not in cache:
+				cache[setting] = {prop: active_extruder.getProperty(setting, prop) for prop in ("type", "minimum_value", "maximum_value")}
+		return cache
+
+	def _intent_keys(self):
+		"""
+		Gets the evaluation entries that the user can fill in.
+		:return: A sorted list of the keys of the intents.
+		"""
+		if self._intents is None:
+			with open(os.path.join(UM.PluginRegistry.PluginRegistry.getInstance().getPluginPath("R2D2"), "intents.def.json")) as f:
+				self._intents = sorted(json.load(f)["settings"])
+		return self._intents
+
+	def _add_to_partition(self, prnt):
+		"""
+		Adds a print to the index of partitions, keeping the partition sorted
+		by time and date.
+		:param prnt: The print to add.
+		:return: The position in its partition that the print was inserted at.
+		"""
+		key = self._partition_key(prnt)
+		if key not in self._partitions:
+			self._partitions[key] = []
+			self._partition_times[key] = []
+		times = self._partition_times[key]
+		position = bisect.bisect_right(times, prnt.time_date)
+		times.insert(position, prnt.time_date)
+		self._partitions[key].insert(position, prnt)
+		return position
+
+	def _remove_from_partition(self, prnt):
+		"""
+		Removes a print from the index of partitions.
+		:param prnt: The print to remove.
+		"""
+		key = self._partition_key(prnt)
+		times = self._partition_times.get(key, [])
+		partition = self._partitions.get(key, [])
+		position = bisect.bisect_left(times, prnt.time_date)
+		while position < len(times) and times[position] == prnt.time_date: #Multiple prints may have the same time and date.
+			if partition[position] is prnt:
+				del times[position]
+				del partition[position]
+				return
+			position += 1
 
 	@staticmethod
 	def get_instance(*args, **kwargs):
@@ -100,48 +462,126 @@ class Prints(UM.Qt.ListModel.ListModel):
 		"""
 		Train a machine learner to be able to generate profiles from the
 		user's intentions.
+
+		The training is done in the background. Its progress is reported
+		through the `training_progress` property.
 		"""
-		if not self.prints:
+		if self._train_job is not None:
+			UM.Logger.Logger.log("w", "Already training. Cancel the current training first.")
+			return
+		if self._current_partition is None or not self.partition(*self._current_partition):
 			UM.Logger.Logger.log("e", "Can't train before there is any training data.")
+			return
+
+		#Train only on the prints made with the current printer, nozzle and material.
+		self._training_partition = self._current_partition
+		prints = list(self.partition(*self._training_partition)) #Copy the list, since prints may get added during training.
+		known_fingerprints = ModelStore.ModelStore.get_instance().fingerprints(self._training_partition)
+		self._train_job = TrainJob.TrainJob(prints, known_fingerprints)
+		self._train_job.progress.connect(self._on_training_progress)
+		self._train_job.finished.connect(self._on_training_finished)
+		self._training_progress = 0
+		self.training_progress_changed.emit()
+		self._train_job.start()
+
+	@PyQt5.QtCore.pyqtSlot()
+	def cancel_training(self):
+		"""
+		Stops the training that is currently running, if any.
+		"""
+		if self._train_job is None:
+			return
+		self._train_job.cancel()
+		self._train_job = None
+		self.training_progress_changed.emit()
 
-		UM.Logger.Logger.log("i", "Starting training based on evaluation data.")
-
-		#TODO: Implement an ensemble system here once we have more than one training method.
-
-		#Train Least Squares individually per setting.
-		for setting in sorted(self.prints[0].evaluated_extruder_settings()):
-			uniques = set() #For enum and string settings, group all of them by uniques so that we can enumerate over them.
-			for prt in self.prints:
-				value = prt.evaluated_extruder_settings()[setting]
-				if type(value) is str:
-					uniques.add(value)
-			uniques = list(sorted(uniques))
-			all_values = [] #Responses.
-			evaluations = [] #Predictors.
-			for prt in self.prints:
-				value = prt.evaluated_extruder_settings()[setting]
-				if type(value) is bool:
-					all_values.append(1 if value else 0)
-					evaluations.append(prt.evaluation())
-				elif type(value) is str:
-					#Create a hyperdimension for this setting with each option in a separate dimension.
-					#The learner will rate each option with a real number and we'll choose the one with the highest rating.
-					for option in uniques:
-						all_values.append(1 if value == option else 0)
-						evaluations.append(prt.evaluation())
-				elif type(value) is list:
-					continue #Skip. We always fill in list settings as an empty list.
-				else: #Numeric settings.
-					all_values.append(value)
-					evaluations.append(prt.evaluation())
-			if(all_values):
-				predictor = LeastSquares.LeastSquares(predictors=evaluations, responses=all_values)
-				multipliers = predictor.train()
-
-				#TODO: Store the function represented by these multipliers in some way until the profiles are generated.
-				print(setting, ":=", multipliers) #DEBUG!
-			else:
-				pass #TODO: Generate empty list [].
+	training_progress_changed = PyQt5.QtCore.pyqtSignal()
+
+	@PyQt5.QtCore.pyqtProperty(bool, notify=training_progress_changed)
+	def is_training(self):
+		"""
+		Whether a training is currently running in the background.
+		:return: `True` if training, or `False` otherwise.
+		"""
+		return self._train_job is not None
+
+	@PyQt5.QtCore.pyqtProperty(float, notify=training_progress_changed)
+	def training_progress(self):
+		"""
+		How far the current training has progressed.
+		:return: The fraction of the training that is completed, between 0
+		and 1.
+		"""
+		return self._training_progress
+
+	def _on_training_progress(self, job, progress):
+		"""
+		Triggered when the training job has progressed.
+		:param job: The job that progressed.
+		:param progress: The percentage of the training that is completed.
+		"""
+		if job is not self._train_job:
+			return #A cancelled job that is still finishing its last tasks.
+		self._training_progress = progress / 100
+		self.training_progress_changed.emit()
+
+	def _on_training_finished(self, job):
+		"""
+		Triggered when the training job has completed.
+		:param job: The job that completed.
+		"""
+		if job is not self._train_job:
+			return #A cancelled job.
+		self._train_job = None
+		self._training_progress = 1
+		self.training_progress_changed.emit()
+
+		result = job.getResult()
+		if result is None:
+			return #Cancelled.
+		ModelStore.ModelStore.get_instance().store(self._training_partition, job.evaluation_keys, job.highest_exponent, job.cross_terms, result, job.fingerprints, job.options, job.errors)
+		UM.Logger.Logger.log("i", "Mean squared error of each trained setting on held-out prints:\n" + "\n".join("{setting}: {error:.6g}".format(setting=setting, error=job.errors[setting]) for setting in sorted(job.errors)))
+
+	@PyQt5.QtCore.pyqtSlot(str)
+	def export_dataset(self, directory):
+		"""
+		Exports the prints of the current configuration as a dataset, to train
+		on without Cura with the headless training script.
+		:param directory: The directory to export the dataset to.
+		"""
+		if self._current_partition is None or not self.partition(*self._current_partition):
+			UM.Logger.Logger.log("e", "Can't export a dataset without any prints.")
+			return
+		try:
+			Dataset.Dataset.from_prints(self.partition(*self._current_partition), self._current_partition).save(directory)
+		except OSError as e:
+			UM.Logger.Logger.log("e", "Unable to export dataset to {directory}: {err}".format(directory=directory, err=str(e)))
+
+	@PyQt5.QtCore.pyqtSlot(str)
+	def import_model(self, file_path):
+		"""
+		Imports a model that was trained with the headless training script.
+		:param file_path: The `.npz` file that the script wrote.
+		"""
+		ModelStore.ModelStore.get_instance().import_model(file_path)
+
+	statistics_changed = PyQt5.QtCore.pyqtSignal()
+
+	@PyQt5.QtCore.pyqtProperty(str, notify=statistics_changed)
+	def stats(self):
+		"""
+		A summary of where the plug-in spent its time.
+		:return: One line for each measurement. If statistics are not being
+		gathered, this is empty.
+		"""
+		return Statistics.Statistics.get_instance().summary()
+
+	def _report_statistics(self):
+		"""
+		Writes the statistics to the log and updates them in the interface.
+		"""
+		Statistics.Statistics.get_instance().log_summary()
+		self.statistics_changed.emit()
 
 	def _update(self):
 		"""
@@ -149,18 +589,16 @@ class Prints(UM.Qt.ListModel.ListModel):
 		"""
 		global_stack = cura.CuraApplication.CuraApplication.getInstance().getGlobalContainerStack()
 		if not global_stack:
+			self._current_partition = None
 			self.setItems([]) #No printer added yet or no printer any more. Must be empty then.
 			return
 		current_printer = global_stack.definition.getId()
 		active_extruder = cura.Settings.ExtruderManager.ExtruderManager.getInstance().getActiveExtruderStack()
 		current_nozzle = active_extruder.variant.getId()
 		current_material = active_extruder.material.getId()
-		items = []
-		for prt in reversed(sorted(self.prints, key=lambda prnt: prnt.time_date)):
-			extruder = prt.extruder(prt.evaluated_extruder)
-			#Only show prints relevant to the current set-up.
-			if current_printer == prt.printer_type and current_nozzle == extruder["nozzle"] and current_material == extruder["material"]:
-				items.append({
-					"print": prt
-				})
-		self.setItems(items)
\ No newline at end of file
+		new_partition = (current_printer, current_nozzle, current_material)
+		if new_partition == self._current_partition:
+			return #Still showing the right prints. Added prints were already inserted.
+		self._current_partition = new_partition
+		#Only show prints relevant to the current set-up, newest first.
+		self.setItems([{"print": prt} for prt in reversed(self.partition(*self._current_partition))])
\ No newline at end of file
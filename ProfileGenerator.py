@@ -0,0 +1,114 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+import numpy
+
+from . import DesignMatrix #To expand the intents to the terms of the polynomials.
+
+class ProfileGenerator:
+	"""
+	Generates setting values from the intents of the user, using a trained
+	model.
+
+	All the work that doesn't depend on the intents is done when the
+	generator is created: grouping the columns of categorical settings and
+	gathering the bounds of the settings. Generating a profile then evaluates
+	the polynomials of all settings with a single matrix product, clamps all
+	values to their bounds at once and picks the best option of each
+	categorical setting at once. This is fast enough to update a preview
+	while the user is moving a slider.
+	"""
+
+	def __init__(self, model, setting_properties=None):
+		"""
+		Prepares to generate profiles with a model.
+		:param model: A trained model, in the form of `ModelStore.get`. If the
+		model has an `options` list, each column that has an option is the
+		rating of that option of a categorical setting. The option with the
+		highest rating is chosen.
+		:param setting_properties: For each setting, a dictionary with its
+		`type` and optionally its `minimum_value` and `maximum_value`. Settings
+		that are not in this dictionary are taken to be unbounded floats.
+		"""
+		if setting_properties is None:
+			setting_properties = {}
+		self._evaluation_keys = list(model["evaluation_keys"])
+		self._highest_exponent = model["highest_exponent"]
+		self._cross_terms = model["cross_terms"]
+		coefficients = numpy.asarray(model["coefficients"], dtype=float)
+		settings = list(model["settings"])
+		options = model.get("options")
+		if options is None:
+			options = [None] * len(settings)
+
+		#Numeric and boolean settings have one column each.
+		numeric_columns = [column for column, option in enumerate(options) if option is None and setting_properties.get(settings[column], {}).get("type", "float") in ("float", "int", "bool")]
+		self._numeric_settings = [settings[column] for column in numeric_columns]
+		self._numeric_coefficients = coefficients[:, numeric_columns]
+		types = [setting_properties.get(setting, {}).get("type", "float") for setting in self._numeric_settings]
+		self._is_int = numpy.array([setting_type == "int" for setting_type in types], dtype=bool)
+		self._is_bool = numpy.array([setting_type == "bool" for setting_type in types], dtype=bool)
+		self._minimum = numpy.array([self._bound(setting_properties, setting, "minimum_value", -numpy.inf) for setting in self._numeric_settings], dtype=float)
+		self._maximum = numpy.array([self._bound(setting_properties, setting, "maximum_value", numpy.inf) for setting in self._numeric_settings], dtype=float)
+
+		#Categorical settings have a column for each option. Pad them to the same number of options so they can be compared all at once.
+		categories = {}
+		for column, option in enumerate(options):
+			if option is not None:
+				categories.setdefault(settings[column], []).append(column)
+		self._categorical_settings = sorted(categories)
+		self._categorical_options = []
+		max_options = max([len(columns) for columns in categories.values()] + [0])
+		self._option_columns = numpy.zeros((len(self._categorical_settings), max_options), dtype=int)
+		self._option_padding = numpy.zeros((len(self._categorical_settings), max_options), dtype=bool)
+		for index, setting in enumerate(self._categorical_settings):
+			columns = categories[setting]
+			self._categorical_options.append([options[column] for column in columns])
+			self._option_columns[index, :len(columns)] = columns
+			self._option_padding[index, len(columns):] = True
+		self._categorical_coefficients = coefficients
+
+	def generate(self, intents):
+		"""
+		Generates the setting values for a set of intents.
+		:param intents: A dictionary of intents, in the same form as the
+		evaluation of a print. Intents that are not provided are taken as 0.
+		:return: A dictionary mapping each setting to its value.
+		"""
+		predictors = numpy.array([[intents.get(key) or 0 for key in self._evaluation_keys]], dtype=float)
+		design_row = DesignMatrix.DesignMatrix.expand_uncached(predictors, self._highest_exponent, self._cross_terms)[0]
+
+		values = numpy.clip(design_row.dot(self._numeric_coefficients), self._minimum, self._maximum)
+		values[self._is_int] = numpy.round(values[self._is_int])
+		result = {}
+		for setting, value, is_int, is_bool in zip(self._numeric_settings, values.tolist(), self._is_int.tolist(), self._is_bool.tolist()):
+			if is_bool:
+				result[setting] = value >= 0.5
+			elif is_int:
+				result[setting] = int(value)
+			else:
+				result[setting] = value
+
+		if self._categorical_settings:
+			ratings = design_row.dot(self._categorical_coefficients)[self._option_columns]
+			ratings[self._option_padding] = -numpy.inf
+			for setting, options, best in zip(self._categorical_settings, self._categorical_options, numpy.argmax(ratings, axis=1).tolist()):
+				result[setting] = options[best]
+
+		return result
+
+	@staticmethod
+	def _bound(setting_properties, setting, bound, default):
+		"""
+		Gets a bound of a setting as a number.
+		:param setting_properties: The properties of all settings.
+		:param setting: The setting to get the bound of.
+		:param bound: The property with the bound, `minimum_value` or
+		`maximum_value`.
+		:param default: The bound to use if the setting has no such bound.
+		:return: The bound.
+		"""
+		value = setting_properties.get(setting, {}).get(bound)
+		if type(value) not in (int, float):
+			return default
+		return value
\ No newline at end of file
@@ -0,0 +1,166 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+import numpy
+
+from . import DesignMatrix #To expand the predictors to the terms of a polynomial.
+
+class RecursiveLeastSquares:
+	"""
+	A least squares learner that can be updated one print at a time.
+
+	Instead of the prints themselves, this learner keeps the sufficient
+	statistics of the least squares problem: `X^T * X` and `X^T * Y`, where X
+	is the design matrix of the polynomial and Y are the setting values.
+	Adding or removing a print changes these by an outer product, which costs
+	`N^2` for `N` terms of the polynomial, regardless of how many prints there
+	are. Solving for the multipliers then only needs the `N` by `N` matrix.
+
+	The terms of the polynomial are standardised before they're added to the
+	statistics, since `X^T * X` of the raw terms can't be solved accurately
+	when evaluation entries are large (such as the print time in seconds). The
+	standardisation is fixed by the first prints that are added, so that the
+	statistics of all prints stay compatible.
+
+	Only numeric and boolean settings are modelled, since these have exactly
+	one value per print. All settings share the same predictors, so they are
+	solved at once. Like in `TrainJob`, a setting that some prints don't have
+	is modelled on the prints that do have it. For those settings, this
+	learner additionally keeps `X^T * X` of the prints that don't have them,
+	to subtract.
+	"""
+
+	def __init__(self, evaluation_keys, settings, highest_exponent=4, cross_terms=False):
+		"""
+		Creates a learner without any prints.
+		:param evaluation_keys: The evaluation entries to use as predictors,
+		in order. Evaluation entries that are missing in a print are taken as
+		0.
+		:param settings: The settings to model, in order.
+		:param highest_exponent: How complex of a polynomial should be fit to
+		the data.
+		:param cross_terms: Whether to also fit the products of each pair of
+		predictors.
+		"""
+		self.evaluation_keys = list(evaluation_keys)
+		self.settings = list(settings)
+		self.highest_exponent = highest_exponent
+		self.cross_terms = cross_terms
+		self.num_samples = 0
+
+		num_terms = DesignMatrix.DesignMatrix.expand_uncached(numpy.zeros((1, len(self.evaluation_keys))), highest_exponent, cross_terms).shape[1]
+		self._means = None #How the terms are standardised, once the first prints are added.
+		self._scales = None
+		self._xtx = numpy.zeros((num_terms, num_terms)) #X^T * X of the standardised terms.
+		self._xty = numpy.zeros((num_terms, len(self.settings))) #X^T * Y of the standardised terms. Prints that don't have a setting contribute nothing to its column.
+		self._missing = {} #For each setting that some prints don't have, X^T * X of those prints and how many there are.
+		self._coefficients = None #Cached solution. Cleared whenever the statistics change.
+		self._model = None #Cached model, so that users can recognise that it didn't change. Cleared whenever the statistics change.
+
+	def add(self, evaluation, settings):
+		"""
+		Adds a print to the learner.
+		:param evaluation: The evaluation of the print.
+		:param settings: The settings that were used for the evaluated extruder
+		of the print.
+		"""
+		self._update([evaluation], [settings], 1)
+
+	def remove(self, evaluation, settings):
+		"""
+		Removes a print from the learner.
+
+		The evaluation and settings must be the same as when the print was
+		added. To update the evaluation of a print, remove the print with the
+		old evaluation and then add it with the new evaluation.
+		:param evaluation: The evaluation of the print when it was added.
+		:param settings: The settings that were used for the evaluated extruder
+		of the print.
+		"""
+		self._update([evaluation], [settings], -1)
+
+	def add_all(self, evaluations, all_settings):
+		"""
+		Adds many prints at once.
+
+		This computes the statistics of all prints with one matrix
+		multiplication, which is much faster than adding them one by one.
+		:param evaluations: A list of the evaluations of the prints.
+		:param all_settings: A list of the settings of the evaluated extruders
+		of the prints, in the same order.
+		"""
+		self._update(evaluations, all_settings, 1)
+
+	def coefficients(self):
+		"""
+		Solves for the multipliers of the polynomial for each setting.
+		:return: An array with the multipliers for each term of the
+		polynomial, with one column for each setting, in the same layout as
+		`LeastSquares.train`. If there are no prints, `None` is returned.
+		"""
+		if self.num_samples == 0:
+			return None
+		if self._coefficients is None:
+			coefficients = numpy.zeros(self._xty.shape)
+			complete = [column for column in range(len(self.settings)) if self._missing.get(column, (None, 0))[1] == 0]
+			if complete: #Settings that all prints have share X^T * X, so they're solved together.
+				coefficients[:, complete], _, _, _ = numpy.linalg.lstsq(self._xtx, self._xty[:, complete], rcond=None) #Least squares rather than inverting, since X^T * X is singular until there are enough prints.
+			for column, (missing_xtx, num_missing) in self._missing.items():
+				if 0 < num_missing < self.num_samples:
+					coefficients[:, column], _, _, _ = numpy.linalg.lstsq(self._xtx - missing_xtx, self._xty[:, column], rcond=None)
+			self._coefficients = DesignMatrix.DesignMatrix.unstandardise(coefficients, self._means, self._scales)
+		return self._coefficients
+
+	def model(self):
+		"""
+		Gets the current state of the learner as a trained model.
+
+		Settings that none of the prints have are left out. The same dictionary
+		is returned until prints are added or removed, so it can be used to
+		cache what is derived from the model.
+		:return: A dictionary in the same form as `ModelStore.get`, but without
+		fingerprints. If there are no prints, `None` is returned.
+		"""
+		if self._model is None:
+			coefficients = self.coefficients()
+			if coefficients is None:
+				return None
+			columns = [column for column in range(len(self.settings)) if self._missing.get(column, (None, 0))[1] < self.num_samples]
+			self._model = {
+				"evaluation_keys": self.evaluation_keys,
+				"highest_exponent": self.highest_exponent,
+				"cross_terms": self.cross_terms,
+				"settings": [self.settings[column] for column in columns],
+				"coefficients": coefficients[:, columns]
+			}
+		return self._model
+
+	def _update(self, evaluations, all_settings, weight):
+		"""
+		Adds or removes prints from the statistics.
+		:param evaluations: The evaluations of the prints.
+		:param all_settings: The settings of the evaluated extruders of the
+		prints, in the same order.
+		:param weight: 1 to add the prints, or -1 to remove them.
+		"""
+		if not evaluations:
+			return
+		predictors = numpy.array([[evaluation.get(key) or 0 for key in self.evaluation_keys] for evaluation in evaluations], dtype=float)
+		design = DesignMatrix.DesignMatrix.expand_uncached(predictors, self.highest_exponent, self.cross_terms)
+		if self._means is None:
+			self._means, self._scales = DesignMatrix.DesignMatrix.standardisation(design)
+		design = (design - self._means) / self._scales
+		responses = numpy.array([[value if type(value) in (bool, int, float) else numpy.nan for value in (settings.get(setting) for setting in self.settings)] for settings in all_settings], dtype=float)
+		missing = numpy.isnan(responses)
+		responses[missing] = 0 #Contributes nothing to X^T * Y.
+
+		self._xtx += weight * design.transpose().dot(design)
+		self._xty += weight * design.transpose().dot(responses)
+		for column in numpy.flatnonzero(missing.any(axis=0)):
+			column = int(column)
+			rows = design[missing[:, column]]
+			missing_xtx, num_missing = self._missing.get(column, (0, 0))
+			self._missing[column] = (missing_xtx + weight * rows.transpose().dot(rows), num_missing + weight * len(rows))
+		self.num_samples += weight * len(evaluations)
+		self._coefficients = None
+		self._model = None
\ No newline at end of file
@@ -0,0 +1,156 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+import numpy
+
+from . import Dataset #To translate the settings of the prints to matrices.
+
+class SimilarityIndex:
+	"""
+	Finds the prints of a partition whose settings are most similar to some
+	settings.
+
+	Each print is a point in settings space. Numeric and boolean settings are
+	normalised by their mean and standard deviation over the prints, so that
+	each setting counts equally regardless of its unit. Categorical settings
+	get a coordinate for each option, which is 1 for the option that was used.
+	Settings that a print doesn't have are placed at the mean. Settings that
+	are the same in all prints are left out, since they don't distinguish
+	prints.
+
+	The points are kept in a matrix together with their squared lengths, so
+	that the distances to all prints are computed with a single matrix-vector
+	product. Prints that are added later are appended to the matrix, with the
+	normalisation of the prints the index was built with. Once the number of
+	prints has doubled, the index is stale. It still finds the added prints,
+	but it should be built again so that the normalisation stays
+	representative. That is left to the owner of the index, since building
+	takes time.
+	"""
+
+	def __init__(self, prints):
+		"""
+		Builds the index over a list of prints.
+		:param prints: The prints to index.
+		"""
+		self._prints = []
+		self._rebuild(list(prints))
+
+	def __len__(self):
+		"""
+		Gets the number of prints in the index.
+		:return: The number of prints.
+		"""
+		return len(self._prints)
+
+	def add(self, prnt):
+		"""
+		Adds a print to the index.
+		:param prnt: The print to add.
+		"""
+		if len(self._prints) == len(self._points): #Out of space. Grow the matrix exponentially, so that appending takes constant time on average.
+			self._points = numpy.concatenate((self._points, numpy.zeros(self._points.shape)), axis=0) if len(self._points) > 0 else numpy.zeros((1, self._points.shape[1]))
+			self._squared_lengths = numpy.concatenate((self._squared_lengths, numpy.zeros(len(self._squared_lengths)))) if len(self._squared_lengths) > 0 else numpy.zeros(1)
+		point = self.point(prnt.evaluated_extruder_settings())
+		self._points[len(self._prints)] = point
+		self._squared_lengths[len(self._prints)] = point.dot(point)
+		self._model_hashes.append(prnt.model_hash)
+		self._prints.append(prnt)
+
+	def is_stale(self):
+		"""
+		Whether so many prints were added since the index was built that its
+		normalisation may no longer be representative.
+		:return: `True` if the index should be built again, or `False` if it's
+		still fine.
+		"""
+		return len(self._prints) >= 2 * self._built_size
+
+	def nearest(self, settings, count=5, model_hash=None, exclude=None):
+		"""
+		Finds the prints with the most similar settings.
+		:param settings: A dictionary of settings to find similar prints for.
+		:param count: How many prints to find at most.
+		:param model_hash: If provided, prints of the same models come first,
+		since their settings were tuned for the same thing.
+		:param exclude: A print to leave out of the results, such as the print
+		that the settings came from.
+		:return: A list of tuples of each print and its distance to the
+		settings, nearest first.
+		"""
+		num_prints = len(self._prints)
+		if num_prints == 0:
+			return []
+		point = self.point(settings)
+		distances = self._squared_lengths[:num_prints] - 2 * self._points[:num_prints].dot(point) + point.dot(point) #Squared distances, by expanding |a - b|^2.
+		distances = numpy.sqrt(numpy.maximum(distances, 0)) #Rounding errors may make them slightly negative.
+		if model_hash is not None:
+			other_model = numpy.array([print_model_hash != model_hash for print_model_hash in self._model_hashes])
+			order = numpy.lexsort((distances, other_model)) #By model first, then by distance.
+		else:
+			order = numpy.argsort(distances)
+		result = []
+		for index in order:
+			if self._prints[index] is exclude:
+				continue
+			result.append((self._prints[index], float(distances[index])))
+			if len(result) >= count:
+				break
+		return result
+
+	def point(self, settings):
+		"""
+		Places settings in the space of this index.
+		:param settings: A dictionary of settings.
+		:return: A vector with the coordinates of the settings.
+		"""
+		numeric = numpy.array([settings.get(setting) for setting in self._numeric_settings], dtype=float) #Converts None to NaN.
+		numeric = numpy.nan_to_num((numeric - self._means) / self._deviations) #Missing settings end up at the mean.
+		one_hot = numpy.zeros(self._num_options)
+		for setting, offset, options in self._categorical_settings:
+			option = options.get(settings.get(setting))
+			if option is not None:
+				one_hot[offset + option] = 1
+		return numpy.concatenate((numeric, one_hot))
+
+	def _rebuild(self, prints):
+		"""
+		Builds the index from scratch.
+		:param prints: The prints to index.
+		"""
+		dataset = Dataset.Dataset.from_prints(prints)
+		if len(prints) > 0:
+			with numpy.errstate(invalid="ignore"): #Settings without any value give NaN here, which is fine.
+				varying = numpy.nanmin(dataset.numeric, axis=0) < numpy.nanmax(dataset.numeric, axis=0) #Not by the deviation, which is not exactly 0 for constant settings due to rounding.
+		else:
+			varying = numpy.zeros(dataset.numeric.shape[1], dtype=bool)
+		means = numpy.nanmean(dataset.numeric[:, varying], axis=0)
+		deviations = numpy.nanstd(dataset.numeric[:, varying], axis=0)
+		self._numeric_settings = [setting for setting, is_varying in zip(dataset.numeric_settings, varying) if is_varying]
+		self._means = means
+		self._deviations = deviations
+
+		self._categorical_settings = [] #For each categorical setting that varies, the offset of its coordinates and the coordinate of each option.
+		self._num_options = 0
+		offsets = {}
+		for setting, options in zip(dataset.categorical_settings, dataset.options):
+			if len(options) < 2:
+				continue
+			self._categorical_settings.append((setting, self._num_options, {option: index for index, option in enumerate(options)}))
+			offsets[setting] = self._num_options
+			self._num_options += len(options)
+
+		#Place all prints at once, the same way as `point` does.
+		self._points = numpy.zeros((len(prints), len(self._numeric_settings) + self._num_options))
+		with numpy.errstate(invalid="ignore"):
+			self._points[:, :len(self._numeric_settings)] = numpy.nan_to_num((dataset.numeric[:, varying] - self._means) / self._deviations)
+		for column, setting in enumerate(dataset.categorical_settings):
+			if len(dataset.options[column]) < 2:
+				continue
+			codes = dataset.codes[:, column]
+			rows = numpy.flatnonzero(codes >= 0)
+			self._points[rows, len(self._numeric_settings) + offsets[setting] + codes[rows]] = 1
+		self._squared_lengths = numpy.einsum("ij,ij->i", self._points, self._points)
+		self._model_hashes = [prnt.model_hash for prnt in prints]
+		self._prints = prints
+		self._built_size = max(len(prints), 1)
\ No newline at end of file
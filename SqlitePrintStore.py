@@ -0,0 +1,203 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+import functools #To load the prints lazily.
+import json #To serialise the settings and evaluation of the prints.
+import sqlite3 #To store the prints in a database.
+import threading #To share the database connection with the training threads.
+
+from . import PrintRecord #To deserialise the prints.
+from . import PrintStore #The interface we're implementing.
+
+class SqlitePrintStore(PrintStore.PrintStore):
+	"""
+	Stores all prints in a single SQLite database.
+
+	The fields that prints are commonly searched by (the printer type, the
+	nozzle and material of the evaluated extruder and the time and date) are
+	stored in separate indexed columns. The settings of the extruders and the
+	evaluation are stored as compact JSON, and only parsed for the prints
+	that match a query.
+	"""
+
+	_insert_statement = "INSERT OR REPLACE INTO prints (time_date, name, printer_type, nozzle, material, evaluated_extruder, model_hash, extruders, evaluation) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+	def __init__(self, database_path):
+		"""
+		Opens the database, creating it if it doesn't exist yet.
+		:param database_path: The file path of the database.
+		"""
+		self._connection = sqlite3.connect(database_path, check_same_thread=False) #Prints may be loaded lazily from the training threads.
+		self._lock = threading.Lock() #So the training threads don't use the connection at the same time as the main thread.
+		with self._connection:
+			self._connection.execute("""
+				CREATE TABLE IF NOT EXISTS prints (
+					time_date TEXT NOT NULL,
+					name TEXT NOT NULL,
+					printer_type TEXT NOT NULL,
+					nozzle TEXT,
+					material TEXT,
+					evaluated_extruder INTEGER NOT NULL,
+					model_hash TEXT,
+					extruders TEXT NOT NULL,
+					evaluation TEXT NOT NULL,
+					PRIMARY KEY (time_date, name)
+				)""")
+			self._connection.execute("CREATE INDEX IF NOT EXISTS prints_configuration ON prints (printer_type, nozzle, material, time_date)")
+
+	def load_all(self):
+		"""
+		Loads all prints in the database.
+		:return: A list of prints.
+		"""
+		return self.query()
+
+	def load_headers(self):
+		"""
+		Loads all prints in the database, but only their headers.
+
+		The extruders and evaluation of each print are only parsed once they
+		are needed.
+		:return: A list of prints.
+		"""
+		result = []
+		with self._lock:
+			rows = self._connection.execute("SELECT name, time_date, printer_type, evaluated_extruder, model_hash, nozzle, material FROM prints").fetchall()
+		for name, time_date, printer_type, evaluated_extruder, model_hash, nozzle, material in rows:
+			header = {
+				"name": name,
+				"time_date": time_date,
+				"printer_type": printer_type,
+				"evaluated_extruder": evaluated_extruder,
+				"model_hash": model_hash,
+				"nozzle": nozzle,
+				"material": material
+			}
+			result.append(PrintRecord.PrintRecord.deserialise_header(header, functools.partial(self._load_body, time_date, name)))
+		return result
+
+	def query(self, printer_type=None, nozzle=None, material=None, since=None, until=None):
+		"""
+		Loads the prints that match certain criteria.
+
+		The filtering is done by the database, using its index.
+		:param printer_type: The definition ID of the printer that the prints
+		must be made with.
+		:param nozzle: The nozzle that the evaluated extruder must have used.
+		:param material: The material that the evaluated extruder must have
+		used.
+		:param since: The earliest time and date of the prints, inclusive.
+		:param until: The latest time and date of the prints, inclusive.
+		:return: A list of the matching prints, sorted by their time and date.
+		"""
+		conditions = []
+		parameters = []
+		for column, operator, value in (("printer_type", "=", printer_type), ("nozzle", "=", nozzle), ("material", "=", material), ("time_date", ">=", since), ("time_date", "<=", until)):
+			if value is not None:
+				conditions.append("{column} {operator} ?".format(column=column, operator=operator))
+				parameters.append(value)
+		statement = "SELECT name, time_date, printer_type, evaluated_extruder, model_hash, extruders, evaluation FROM prints"
+		if conditions:
+			statement += " WHERE " + " AND ".join(conditions)
+		statement += " ORDER BY time_date"
+
+		with self._lock:
+			rows = self._connection.execute(statement, parameters).fetchall()
+		result = []
+		for name, time_date, printer_type, evaluated_extruder, model_hash, extruders, evaluation in rows:
+			result.append(PrintRecord.PrintRecord.deserialise({
+				"name": name,
+				"time_date": time_date,
+				"printer_type": printer_type,
+				"evaluated_extruder": evaluated_extruder,
+				"model_hash": model_hash,
+				"extruders": json.loads(extruders),
+				"evaluation": json.loads(evaluation)
+			}))
+		return result
+
+	def save(self, prnt):
+		"""
+		Saves a print to the database.
+		:param prnt: The print to save.
+		"""
+		row = self._row(prnt) #Before locking, since serialising may need to load the print from this database.
+		with self._lock, self._connection:
+			self._connection.execute(SqlitePrintStore._insert_statement, row)
+
+	def save_all(self, prints):
+		"""
+		Saves many prints to the database in a single transaction.
+		:param prints: The prints to save.
+		"""
+		rows = [self._row(prnt) for prnt in prints]
+		with self._lock, self._connection:
+			self._connection.executemany(SqlitePrintStore._insert_statement, rows)
+
+	def move(self, prnt, old_time_date, old_name):
+		"""
+		Saves a print that was previously stored under a different time and
+		date or name, and removes the old entry, in a single transaction.
+		:param prnt: The print to save.
+		:param old_time_date: The time and date that the print was stored
+		under.
+		:param old_name: The name that the print was stored under.
+		"""
+		row = self._row(prnt)
+		with self._lock, self._connection:
+			self._connection.execute("DELETE FROM prints WHERE time_date = ? AND name = ?", (old_time_date, old_name))
+			self._connection.execute(SqlitePrintStore._insert_statement, row)
+
+	def remove(self, time_date, name):
+		"""
+		Removes a print from the database, if it exists.
+		:param time_date: The time and date of the print to remove.
+		:param name: The name of the print to remove.
+		"""
+		with self._lock, self._connection:
+			self._connection.execute("DELETE FROM prints WHERE time_date = ? AND name = ?", (time_date, name))
+
+	def migrate_from(self, other_store):
+		"""
+		Copies all prints from a different store into this database.
+
+		This is done in a single transaction, so a migration that is
+		interrupted doesn't leave half of the prints behind.
+		:param other_store: The store to copy the prints from.
+		"""
+		self.save_all(other_store.load_all())
+
+	def _load_body(self, time_date, name):
+		"""
+		Loads the extruders and evaluation of one print.
+		:param time_date: The time and date of the print to load.
+		:param name: The name of the print to load.
+		:return: A dictionary containing the extruders and evaluation of the
+		print.
+		"""
+		with self._lock:
+			extruders, evaluation = self._connection.execute("SELECT extruders, evaluation FROM prints WHERE time_date = ? AND name = ?", (time_date, name)).fetchone()
+		return {
+			"extruders": json.loads(extruders),
+			"evaluation": json.loads(evaluation)
+		}
+
+	def _row(self, prnt):
+		"""
+		Converts a print to the values of a row in the database.
+		:param prnt: The print to convert.
+		:return: A tuple of values in the order of the insert statement.
+		"""
+		document = prnt.serialise()
+		header = prnt.header()
+		return (
+			document["time_date"],
+			document["name"],
+			document["printer_type"],
+			header["nozzle"],
+			header["material"],
+			document["evaluated_extruder"],
+			document["model_hash"],
+			json.dumps(document["extruders"], separators=(",", ":")),
+			json.dumps(document["evaluation"], separators=(",", ":"))
+		)
\ No newline at end of file
@@ -0,0 +1,151 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+import contextlib #To time blocks of code.
+import cProfile #To optionally profile the timed blocks.
+import os #To find where to store the profiles.
+import threading #Training reports from multiple threads.
+import time #To time blocks of code.
+import UM.Logger
+import UM.Preferences #To find out whether to gather statistics.
+import UM.Resources #To find where to store the profiles.
+
+class Statistics:
+	"""
+	Measures where the plug-in spends its time.
+
+	Blocks of code are timed with `timer`, and events are counted with
+	`count`. For every name, this keeps how often it happened, how long it
+	took in total and how long the slowest one took.
+
+	This is disabled unless the preference `r2d2/statistics` is set. While
+	disabled, timing and counting return right away. If the preference
+	`r2d2/profile` is set as well, the outermost timed blocks are profiled
+	too, and the profiles are stored in the data directory as
+	`r2d2_profiles/<name>.prof`, to inspect with `pstats` or SnakeViz.
+	"""
+
+	_disabled_timer = contextlib.suppress() #Suppressing nothing makes for a re-usable context manager that does nothing.
+
+	inst = None
+
+	@staticmethod
+	def get_instance():
+		"""
+		Get an instance of this class.
+
+		This implements the singleton pattern.
+		:return: An instance of this class.
+		"""
+		if Statistics.inst is None:
+			preferences = UM.Preferences.Preferences.getInstance()
+			preferences.addPreference("r2d2/statistics", False)
+			preferences.addPreference("r2d2/profile", False)
+			Statistics.inst = Statistics(preferences.getValue("r2d2/statistics"), preferences.getValue("r2d2/profile"), os.path.join(UM.Resources.Resources.getDataStoragePath(), "r2d2_profiles"))
+		return Statistics.inst
+
+	def __init__(self, enabled=False, profile=False, profile_directory=None):
+		"""
+		Prepares to gather statistics.
+		:param enabled: Whether to gather statistics at all.
+		:param profile: Whether to profile the timed blocks as well.
+		:param profile_directory: Where to store the profiles.
+		"""
+		self.enabled = enabled
+		self._profile = profile and profile_directory is not None
+		self._profile_directory = profile_directory
+		self._profiling = False #Only one profiler can be active at a time, so nested blocks are not profiled separately.
+		self._lock = threading.Lock()
+		self._counts = {} #For each name, how often it happened.
+		self._totals = {} #For each name, how many seconds it took in total.
+		self._maxima = {} #For each name, how many seconds the slowest one took.
+
+	def timer(self, name):
+		"""
+		Times a block of code.
+
+		Use this as a context manager: `with statistics.timer("name"):`.
+		:param name: The name to gather the time under.
+		:return: A context manager that times its block.
+		"""
+		if not self.enabled:
+			return self._disabled_timer
+		return self._timed(name)
+
+	@contextlib.contextmanager
+	def _timed(self, name):
+		"""
+		Times a block of code, and profiles it if needed.
+		:param name: The name to gather the time under.
+		"""
+		profiler = None
+		if self._profile:
+			with self._lock:
+				if not self._profiling:
+					self._profiling = True
+					profiler = cProfile.Profile()
+		if profiler is not None:
+			profiler.enable()
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.add_time(name, time.perf_counter() - start)
+			if profiler is not None:
+				profiler.disable()
+				try:
+					if not os.path.exists(self._profile_directory):
+						os.mkdir(self._profile_directory)
+					profiler.dump_stats(os.path.join(self._profile_directory, name + ".prof"))
+				except OSError as e:
+					UM.Logger.Logger.log("w", "Unable to store profile of {name}: {err}".format(name=name, err=str(e)))
+				with self._lock:
+					self._profiling = False
+
+	def count(self, name, amount=1):
+		"""
+		Counts an event.
+		:param name: The name of the event.
+		:param amount: How many times the event happened.
+		"""
+		if not self.enabled:
+			return
+		with self._lock:
+			self._counts[name] = self._counts.get(name, 0) + amount
+
+	def add_time(self, name, seconds, amount=1):
+		"""
+		Adds the time that some events took.
+		:param name: The name to gather the time under.
+		:param seconds: How long the events took together.
+		:param amount: How many events there were.
+		"""
+		if not self.enabled:
+			return
+		with self._lock:
+			self._counts[name] = self._counts.get(name, 0) + amount
+			self._totals[name] = self._totals.get(name, 0) + seconds
+			self._maxima[name] = max(self._maxima.get(name, 0), seconds / amount)
+
+	def summary(self):
+		"""
+		Gets a human-readable summary of the statistics.
+		:return: One line for each name, in alphabetical order. If nothing was
+		measured, this is empty.
+		"""
+		with self._lock:
+			lines = []
+			for name in sorted(self._counts):
+				if name in self._totals:
+					lines.append("{name}: {count}x, {total:.1f} ms total, {maximum:.1f} ms max".format(name=name, count=self._counts[name], total=self._totals[name] * 1000, maximum=self._maxima[name] * 1000))
+				else:
+					lines.append("{name}: {count}x".format(name=name, count=self._counts[name]))
+		return "\n".join(lines)
+
+	def log_summary(self):
+		"""
+		Writes the summary of the statistics to the log.
+		"""
+		summary = self.summary()
+		if summary:
+			UM.Logger.Logger.log("i", "R2D2 statistics:\n" + summary)
\ No newline at end of file
@@ -0,0 +1,288 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+import concurrent.futures #To train multiple settings in parallel.
+import numpy #To train many settings at once.
+import os #To find how many cores we can use.
+import time #To measure how long each setting takes to train.
+import UM.Job #This is a background job.
+import UM.Logger
+
+from . import Dataset #To translate the prints to matrices once for all settings.
+from . import DesignMatrix #To find how many terms the polynomials have.
+from . import LeastSquares #To train a polynomial model.
+from . import ModelStore #To fingerprint the training data.
+from . import Statistics #To measure how long training takes.
+
+class TrainJob(UM.Job.Job):
+	"""
+	Trains models for all settings in the background, so that the interface
+	stays responsive while training.
+
+	The settings are divided into separate training tasks, which are executed
+	in parallel on all available cores. Progress is reported through the
+	`progress` signal of the job, as a percentage of the tasks that were
+	completed. The result of the job is a dictionary that maps each trained
+	setting to the multipliers of its polynomial, or `None` if the job was
+	cancelled.
+
+	Categorical settings are trained as a rating for each of their options,
+	which is 1 for prints that used that option and 0 otherwise. Their
+	multipliers have a column for each option, in the order of `options`.
+
+	Settings whose training data has the same fingerprint as the last time
+	they were trained are skipped, since training them again would give the
+	same result.
+
+	Each setting gets the polynomial degree that predicts the held-out prints
+	best, up to `highest_exponent`. The multipliers of lower degrees are padded
+	with zeros, so all settings have the same layout. Settings that are not
+	predicted better than by their mean value are stored as that constant.
+	Settings that none of the prints have are left out of the result.
+	"""
+
+	highest_exponent = 4 #How complex of a polynomial to fit for each setting.
+	cross_terms = False #Whether to model interactions between evaluation entries.
+	columns_per_task = 64 #How many outputs to train in one task. Smaller tasks report progress more often, but repeat the setup more often.
+	seed = None #Seed for choosing the bags to train on, to get reproducible results. If None, the bags are random.
+
+	def __init__(self, prints, known_fingerprints=None):
+		"""
+		Prepares to train on a set of prints.
+		:param prints: The prints to train with. This list must not change
+		while training, so pass a copy. This may also be a dataset that the
+		prints were exported to.
+		:param known_fingerprints: For settings that were trained before, the
+		fingerprints of their training data at that time.
+		"""
+		super().__init__()
+		self._prints = prints
+		self._known_fingerprints = known_fingerprints if known_fingerprints is not None else {}
+		self._cancelled = False
+		self._constants = {} #While running, the value of each output that is the same in all prints.
+
+		self.evaluation_keys = [] #After running, the evaluation entry of each predictor.
+		self.fingerprints = {} #After running, the fingerprint of the training data of each setting that was trained.
+		self.cardinalities = {} #After running, how many different values each output has over the prints.
+		self.options = {} #After running, for each categorical setting that was trained, the options in the order of the columns of its multipliers.
+		self.errors = {} #After running, the mean squared error on held-out prints of each setting that was trained, or NaN if there were too few prints to hold any out.
+
+	def cancel(self):
+		"""
+		Stops the training.
+
+		If the job didn't start yet, it will not start at all. If it is
+		running, the tasks that are in progress will finish but no new tasks
+		will be started.
+		"""
+		self._cancelled = True
+		super().cancel()
+
+	def is_cancelled(self):
+		"""
+		Whether the training was cancelled before it could finish.
+		:return: `True` if the training was cancelled, or `False` otherwise.
+		"""
+		return self._cancelled
+
+	def run(self):
+		"""
+		Trains all settings.
+		"""
+		UM.Logger.Logger.log("i", "Starting training based on evaluation data.")
+		statistics = Statistics.Statistics.get_instance()
+		start = time.perf_counter()
+
+		#TODO: Implement an ensemble system here once we have more than one training method.
+
+		with statistics.timer("prepare_training"):
+			tasks = self._create_tasks()
+		columns = {} #The multipliers of each output: A setting, or a setting and an option.
+		num_constant = 0
+		with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor: #Numpy releases the GIL while solving, so threads can use all cores.
+			random = numpy.random.RandomState(self.seed) #Seeds are drawn before any task starts, so that they don't depend on which thread is first.
+			futures = [executor.submit(self._train_task, predictors, responses, random.randint(2 ** 31)) for predictors, responses in tasks.values()]
+			columns_of = dict(zip(futures, tasks.keys()))
+			for done, future in enumerate(concurrent.futures.as_completed(futures)):
+				if self._cancelled:
+					for pending in futures:
+						pending.cancel()
+					UM.Logger.Logger.log("i", "Training was cancelled.")
+					self.setResult(None)
+					return
+				multipliers, errors, constant = future.result()
+				for column_index, column in enumerate(columns_of[future]):
+					columns[column] = (multipliers[:, column_index], float(errors[column_index]))
+				num_constant += int(numpy.sum(constant))
+				self.progress.emit(self, (done + 1) * 100 / len(futures))
+
+		#Outputs that are the same in every print don't need to be trained.
+		num_terms = DesignMatrix.DesignMatrix.expand_uncached(numpy.zeros((1, len(self.evaluation_keys))), self.highest_exponent, self.cross_terms).shape[1]
+		for column, value in self._constants.items():
+			multipliers = numpy.zeros(num_terms)
+			multipliers[0] = value
+			columns[column] = (multipliers, 0.0)
+
+		result = {}
+		for column, (multipliers, error) in columns.items():
+			if type(column) is str: #Numeric setting.
+				result[column] = multipliers
+				self.errors[column] = error
+		for setting, options in self.options.items(): #Categorical settings get a column of multipliers for each option.
+			result[setting] = numpy.stack([columns[(setting, option)][0] for option in options], axis=1)
+			self.errors[setting] = float(numpy.mean([columns[(setting, option)][1] for option in options]))
+
+		UM.Logger.Logger.log("i", "Training completed for {num_settings} settings. {num_skipped} settings were unchanged. {num_absent} settings had no value in any print. {num_fixed} outputs were the same in all prints. {num_constant} outputs were not predicted better than by a constant.".format(num_settings=len(result), num_skipped=self._num_skipped, num_absent=self._num_absent, num_fixed=len(self._constants), num_constant=num_constant))
+		statistics.add_time("train", time.perf_counter() - start)
+		self.setResult(result)
+
+	def _create_tasks(self):
+		"""
+		Divides the training into separate tasks.
+
+		Every task trains a group of outputs at once: Each numeric or boolean
+		setting is one output, and each option of a categorical setting is
+		another. Settings whose training data didn't change are left out.
+
+		Before dividing, the relevance of each output is measured, all at once,
+		as the number of different values it has over the prints. Settings that
+		no print has are left out entirely. Outputs that have the same value in
+		every print are not trained, but stored as constants right away.
+		Settings that some prints don't have are trained only on the prints
+		that have them. Outputs that are present
+		in the same prints share a task, since they share the predictors.
+		:return: A dictionary mapping tuples of the outputs that each task
+		trains to a tuple of the predictors and the responses to train with.
+		Numeric settings are identified by their key, options of categorical
+		settings by a tuple of the setting key and the option.
+		"""
+		dataset = self._prints if isinstance(self._prints, Dataset.Dataset) else Dataset.Dataset.from_prints(self._prints) #Translate the prints to matrices only once for all settings.
+		evaluations = dataset.evaluations
+		self.evaluation_keys = evaluations.keys
+		evaluations_fingerprint = ModelStore.ModelStore.fingerprint_evaluations(evaluations, self.highest_exponent, self.cross_terms)
+		self._num_skipped = 0
+		self._num_absent = 0
+		self._constants = {}
+
+		outputs = [] #Which setting or option each column of responses is.
+		responses = [] #Matrices of responses, one row per print. Prints that don't have the setting get NaN.
+
+		for column, setting in enumerate(dataset.numeric_settings):
+			values = numpy.asarray(dataset.numeric[:, column]) #Reads the column if the dataset is memory-mapped.
+			fingerprint = ModelStore.ModelStore.fingerprint_setting(evaluations_fingerprint, values.tolist())
+			if self._known_fingerprints.get(setting) == fingerprint:
+				self._num_skipped += 1
+				continue #Trained on exactly the same data before.
+			outputs.append(setting)
+			responses.append(values[:, numpy.newaxis])
+			self.fingerprints[setting] = fingerprint
+		for column, setting in enumerate(dataset.categorical_settings):
+			codes = numpy.asarray(dataset.codes[:, column])
+			options = dataset.options[column]
+			fingerprint = ModelStore.ModelStore.fingerprint_setting(evaluations_fingerprint, [options[code] if code >= 0 else None for code in codes.tolist()])
+			if self._known_fingerprints.get(setting) == fingerprint:
+				self._num_skipped += 1
+				continue
+			#Let the learner rate each option with a real number. We'll choose the one with the highest rating.
+			is_present = codes >= 0
+			one_hot = numpy.full((len(codes), len(options)), numpy.nan)
+			one_hot[is_present] = 0
+			one_hot[numpy.flatnonzero(is_present), codes[is_present]] = 1
+			self.options[setting] = list(options)
+			outputs.extend((setting, option) for option in options)
+			responses.append(one_hot)
+			self.fingerprints[setting] = fingerprint
+
+		tasks = {}
+		if not outputs:
+			return tasks
+		responses = numpy.hstack(responses)
+
+		#Measure the relevance of all outputs at once, by counting their different values. Not by the variance, which is not exactly 0 for constant outputs due to rounding.
+		missing = numpy.isnan(responses)
+		ordered = numpy.sort(responses, axis=0) #NaN is sorted last, so each value that differs from the one before it is a new value.
+		cardinalities = numpy.sum(ordered[1:] > ordered[:-1], axis=0) + ~missing.all(axis=0)
+		self.cardinalities = dict(zip(outputs, cardinalities.tolist()))
+		for column in numpy.flatnonzero(cardinalities == 0): #No print has this setting, so there is nothing to train or to store.
+			setting = outputs[column] if type(outputs[column]) is str else outputs[column][0]
+			if setting in self.fingerprints:
+				del self.fingerprints[setting]
+				self.options.pop(setting, None)
+				self._num_absent += 1
+		for column in numpy.flatnonzero(cardinalities == 1):
+			self._constants[outputs[column]] = float(responses[~missing[:, column], column][0])
+
+		#Group the outputs that need training by which prints have them.
+		groups = {}
+		for column in numpy.flatnonzero(cardinalities > 1):
+			groups.setdefault(missing[:, column].tobytes(), []).append(column)
+		for group in groups.values():
+			rows = numpy.flatnonzero(~missing[:, group[0]])
+			predictors = evaluations if len(rows) == len(dataset) else evaluations.select(rows)
+			for start in range(0, len(group), self.columns_per_task):
+				columns = group[start:start + self.columns_per_task]
+				tasks[tuple(outputs[column] for column in columns)] = (predictors, responses[rows][:, columns])
+		return tasks
+
+	def _train_task(self, predictors, responses, seed):
+		"""
+		Trains one task.
+
+		This is executed on one of the threads of the thread pool. Every degree
+		of polynomial up to the highest exponent is trained, and each setting
+		gets the degree with the least error on the held-out prints.
+		:param predictors: The evaluation matrix to train with.
+		:param responses: The setting values to train for.
+		:param seed: The seed to choose the bags with.
+		:return: A tuple of three: the multipliers of the polynomials with one
+		column per setting, the error of each setting, and for each setting
+		whether it was replaced by a constant. If the training was cancelled
+		before this task could start, `None` is returned.
+		"""
+		if self._cancelled:
+			return None
+		start = time.perf_counter()
+		responses = numpy.array(responses, dtype=float)
+		if responses.ndim == 1:
+			responses = responses[:, numpy.newaxis]
+
+		best_multipliers = None
+		best_errors = numpy.full(responses.shape[1], numpy.inf)
+		for exponent in range(1, self.highest_exponent + 1):
+			#The same seed for every degree gives the same bags, so their errors can be compared.
+			learner = LeastSquares.LeastSquares(predictors=predictors, responses=responses, highest_exponent=exponent, cross_terms=self.cross_terms, seed=seed)
+			multipliers = self._pad_multipliers(learner.train(), len(predictors.keys), exponent)
+			if best_multipliers is None:
+				best_multipliers = multipliers
+			better = ~(learner.errors >= best_errors) #If the errors are unknown (NaN), the most complex polynomial wins.
+			best_multipliers[:, better] = multipliers[:, better]
+			best_errors[better] = learner.errors[better]
+
+		#Settings that the polynomial doesn't predict better than the mean are better off with the mean.
+		constant = best_errors >= learner.baseline_errors
+		best_multipliers[:, constant] = 0
+		best_multipliers[0, constant] = numpy.mean(responses[:, constant], axis=0)
+		best_errors[constant] = learner.baseline_errors[constant]
+		Statistics.Statistics.get_instance().add_time("train_output", time.perf_counter() - start, responses.shape[1]) #Per output, since the outputs of a task are trained together.
+		return best_multipliers, best_errors, constant
+
+	def _pad_multipliers(self, multipliers, num_predictors, exponent):
+		"""
+		Places the multipliers of a polynomial of a lower degree in the layout
+		of a polynomial with the highest exponent.
+
+		The terms that the lower degree doesn't have get a multiplier of 0.
+		:param multipliers: The multipliers of the polynomial, with one column
+		per setting.
+		:param num_predictors: How many predictors the polynomial has.
+		:param exponent: The highest exponent of the polynomial.
+		:return: The multipliers in the layout of the highest exponent.
+		"""
+		if exponent == self.highest_exponent:
+			return multipliers
+		num_cross = len(multipliers) - 1 - num_predictors * exponent
+		indices = [0] + [1 + predictor * self.highest_exponent + power for predictor in range(num_predictors) for power in range(exponent)]
+		indices += range(1 + num_predictors * self.highest_exponent, 1 + num_predictors * self.highest_exponent + num_cross)
+		padded = numpy.zeros((1 + num_predictors * self.highest_exponent + num_cross, multipliers.shape[1]))
+		padded[indices] = multipliers
+		return padded
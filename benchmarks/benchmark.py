@@ -0,0 +1,140 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+"""
+Measures the plug-in on synthetic histories of prints, without Cura.
+
+Run this with `python benchmarks/benchmark.py`. For each corpus size, this
+prints how long the most important operations take, so that regressions show
+up as numbers:
+
+* save: Saving every print of the corpus to the print store.
+* load_cold: Creating the list of prints when the store has no index yet.
+* load_warm: Creating the list of prints when the store has an index.
+* update: Switching to another printer, nozzle and material, on average.
+* least_squares: Constructing a learner for the largest configuration.
+* train: Training the largest configuration.
+"""
+
+import argparse #To parse the command line.
+import os #To clean up the data directory.
+import shutil #To clean up the data directory.
+import sys #To find the headless stand-ins.
+import tempfile #To store the data of the plug-in somewhere temporary.
+import time #To measure.
+
+import corpus #To generate the prints.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+import headless #To run the plug-in without Cura.
+
+def measure(function, repeat):
+	"""
+	Measures how long a function takes.
+	:param function: The function to measure. It's called without arguments.
+	:param repeat: How often to call the function. The fastest time counts,
+	since the slower ones are disturbed by other processes.
+	:return: The fastest time in seconds.
+	"""
+	best = float("inf")
+	for _ in range(repeat):
+		start = time.perf_counter()
+		function()
+		best = min(best, time.perf_counter() - start)
+	return best
+
+def benchmark(num_prints, repeat, store):
+	"""
+	Measures the plug-in with a corpus of a certain size.
+	:param num_prints: How many prints to generate.
+	:param repeat: How often to repeat each measurement.
+	:param store: Which print store to use, `json` or `sqlite`.
+	:return: A dictionary mapping the name of each measurement to the time it
+	took in seconds.
+	"""
+	data_directory = tempfile.mkdtemp(prefix="r2d2_benchmark_")
+	try:
+		headless.install(data_directory)
+		headless.Logger.verbose = False #Only warnings and errors, so that they don't drown the measurements.
+		headless.Preferences.setValue("r2d2/print_store", store)
+		headless.reset()
+		Prints = headless.load_plugin("Prints")
+		PrintRecord = headless.load_plugin("PrintRecord")
+		PrintStore = headless.load_plugin("PrintStore")
+		ModelStore = headless.load_plugin("ModelStore")
+		EvaluationMatrix = headless.load_plugin("EvaluationMatrix")
+		LeastSquares = headless.load_plugin("LeastSquares")
+		application = headless.CuraApplication.getInstance()
+		documents = corpus.generate(num_prints, headless.plugin_path)
+		results = {}
+
+		records = [PrintRecord.PrintRecord.deserialise(document) for document in documents]
+		def save():
+			for record in records:
+				record.save()
+		results["save"] = measure(save, repeat)
+
+		#The largest configuration is the one that's displayed and trained.
+		sizes = {}
+		for record in records:
+			key = (record.printer_type, record.evaluated_nozzle(), record.evaluated_material())
+			sizes[key] = sizes.get(key, 0) + 1
+		largest = max(sizes, key=sizes.get)
+		application.configure(*largest)
+
+		index_path = os.path.join(data_directory, "print_evaluations_index.json")
+		def load_cold():
+			headless.reset()
+			if os.path.exists(index_path):
+				os.remove(index_path)
+			Prints.Prints.get_instance()
+		results["load_cold"] = measure(load_cold, repeat)
+		def load_warm():
+			headless.reset()
+			PrintStore.PrintStore.get_instance().load_headers() #Make sure that the index exists.
+			Prints.Prints.inst = None
+			start = time.perf_counter()
+			Prints.Prints.get_instance()
+			return time.perf_counter() - start
+		results["load_warm"] = min(load_warm() for _ in range(repeat))
+
+		prints = Prints.Prints.get_instance()
+		def update():
+			for configuration in sizes:
+				application.configure(*configuration) #Triggers the update.
+		results["update"] = measure(update, repeat) / len(sizes)
+		application.configure(*largest)
+
+		partition = prints.partition(*largest)
+		evaluations = [prnt.evaluation() for prnt in partition]
+		responses = [[value for value in prnt.evaluated_extruder_settings().values() if type(value) in (bool, int, float)] for prnt in partition]
+		def least_squares():
+			headless.load_plugin("DesignMatrix").DesignMatrix._cache.clear()
+			LeastSquares.LeastSquares(EvaluationMatrix.EvaluationMatrix(evaluations), responses)
+		results["least_squares"] = measure(least_squares, repeat)
+
+		def train():
+			ModelStore.ModelStore.get_instance()._models.clear() #Otherwise the settings are not trained again.
+			prints.train()
+		results["train"] = measure(train, repeat)
+		return results
+	finally:
+		shutil.rmtree(data_directory, ignore_errors=True)
+
+def main():
+	"""
+	Runs the benchmarks and prints a table of the results.
+	"""
+	parser = argparse.ArgumentParser(description="Measure the R2D2 plug-in on synthetic prints.")
+	parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000], help="The numbers of prints to measure with.")
+	parser.add_argument("--repeat", type=int, default=3, help="How often to repeat each measurement.")
+	parser.add_argument("--store", choices=["json", "sqlite"], default="json", help="The print store to measure.")
+	arguments = parser.parse_args()
+
+	columns = ["save", "load_cold", "load_warm", "update", "least_squares", "train"]
+	print("{prints:>8}".format(prints="prints") + "".join("{column:>15}".format(column=column) for column in columns))
+	for size in arguments.sizes:
+		results = benchmark(size, arguments.repeat, arguments.store)
+		print("{prints:>8}".format(prints=size) + "".join("{time:>14.4f}s".format(time=results[column]) for column in columns), flush=True)
+
+if __name__ == "__main__":
+	main()
\ No newline at end of file
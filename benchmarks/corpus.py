@@ -0,0 +1,118 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+"""
+Generates synthetic histories of prints to measure the plug-in with.
+
+The prints resemble those of real users: A few printers with one to four
+extruders, about 600 leaf settings per extruder of which most are left at
+their defaults, and evaluations with the intents of `intents.def.json`. The
+settings that vary depend partly on the evaluation, so there is something to
+learn.
+"""
+
+import datetime #To give the prints consecutive times and dates.
+import json #To read the intents.
+import os #To find the intents.
+import random #To generate the prints.
+
+#Printer types with the number of extruders they have.
+printers = [("ultimaker3", 2), ("ultimaker2_plus", 1), ("creality_cr10", 1), ("prusa_i3_mk2_mmu", 4)]
+nozzles = ["AA 0.4", "AA 0.8", "BB 0.4"]
+materials = ["generic_pla", "generic_abs", "generic_petg", "generic_pva"]
+
+def intents(plugin_path):
+	"""
+	Gets the intents that the user can evaluate prints with.
+	:param plugin_path: The directory of the plug-in.
+	:return: A dictionary mapping each intent to its definition.
+	"""
+	with open(os.path.join(plugin_path, "intents.def.json")) as f:
+		return json.load(f)["settings"]
+
+def _defaults(rng, num_settings):
+	"""
+	Generates the default values of all settings of a printer.
+	:param rng: The random generator to use.
+	:param num_settings: How many leaf settings there are.
+	:return: A dictionary of setting values.
+	"""
+	result = {}
+	for index in range(num_settings):
+		kind = rng.random()
+		if kind < 0.7:
+			result["setting_{index}".format(index=index)] = round(rng.uniform(0, 200), 2)
+		elif kind < 0.85:
+			result["setting_{index}".format(index=index)] = rng.randint(0, 100)
+		elif kind < 0.95:
+			result["setting_{index}".format(index=index)] = rng.random() < 0.5
+		else:
+			result["setting_{index}".format(index=index)] = rng.choice(["grid", "lines", "triangles", "zigzag"])
+	return result
+
+def generate(num_prints, plugin_path, num_settings=600, num_varying=30, seed=0):
+	"""
+	Generates a history of prints.
+	:param num_prints: How many prints to generate.
+	:param plugin_path: The directory of the plug-in, to find the intents.
+	:param num_settings: How many leaf settings each extruder has.
+	:param num_varying: How many of those settings the user changes between
+	prints.
+	:param seed: Seed for the random generator, so that the same corpus can
+	be generated again.
+	:return: A list of prints, serialised in the form of
+	`PrintRecord.serialise`.
+	"""
+	rng = random.Random(seed)
+	intent_definitions = intents(plugin_path)
+	numeric_intents = sorted(key for key, definition in intent_definitions.items() if definition["type"] == "float")
+	bool_intents = sorted(key for key, definition in intent_definitions.items() if definition["type"] == "bool")
+	defaults = {printer_type: _defaults(rng, num_settings) for printer_type, _ in printers}
+	varying = {printer_type: rng.sample(range(num_settings), num_varying) for printer_type, _ in printers} #Users tend to tweak the same settings every time.
+
+	start = datetime.datetime(2018, 1, 1)
+	result = []
+	for print_index in range(num_prints):
+		printer_type, num_extruders = rng.choice(printers)
+		default = defaults[printer_type]
+
+		evaluation = {}
+		if rng.random() < 0.8: #Not every print gets evaluated.
+			for intent in numeric_intents:
+				if rng.random() < 0.6:
+					evaluation[intent] = round(rng.uniform(0, 10), 1)
+			for intent in bool_intents:
+				if rng.random() < 0.3:
+					evaluation[intent] = rng.random() < 0.5
+		quality = sum(value for value in evaluation.values() if type(value) is float) / max(len(evaluation), 1)
+
+		extruders = []
+		for extruder_index in range(num_extruders):
+			settings = dict(default)
+			for setting_index in varying[printer_type]:
+				if rng.random() < 0.5:
+					continue
+				key = "setting_{index}".format(index=setting_index)
+				value = settings[key]
+				if type(value) is float:
+					settings[key] = round(value * (0.5 + quality / 10) + rng.gauss(0, 1), 2) #Depends on the evaluation, with some noise.
+				elif type(value) is int:
+					settings[key] = value + rng.randint(-5, 5)
+				elif type(value) is bool:
+					settings[key] = not value
+				else:
+					settings[key] = rng.choice(["grid", "lines", "triangles", "zigzag"])
+			settings["nozzle"] = rng.choice(nozzles)
+			settings["material"] = rng.choice(materials)
+			extruders.append(settings)
+
+		result.append({
+			"name": "print_{index}".format(index=print_index),
+			"time_date": (start + datetime.timedelta(minutes=print_index)).strftime("%Y-%m-%d_%H-%M-%S"),
+			"printer_type": printer_type,
+			"evaluated_extruder": rng.randrange(num_extruders),
+			"model_hash": "sha256:{hash:064x}".format(hash=rng.getrandbits(256)),
+			"extruders": extruders,
+			"evaluation": evaluation
+		})
+	return result
\ No newline at end of file
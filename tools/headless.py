@@ -0,0 +1,355 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+"""
+Lightweight stand-ins for the parts of Uranium, Cura and PyQt that the
+plug-in uses, so that it can run without launching Cura. The headless tools
+use these to train, and the benchmarks use them to measure.
+
+Only the behaviour that the plug-in relies on is implemented. Signals are
+called synchronously and jobs run on the thread that starts them.
+"""
+
+import importlib #To load the plug-in.
+import os #To find the plug-in.
+import sys #To install the stand-ins as modules.
+import types #To create the stand-in modules.
+
+plugin_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+data_path = None #Where the plug-in stores its data. Set by `install`.
+
+class Signal:
+	"""
+	Stand-in for signals of Qt and Uranium.
+	"""
+
+	def __init__(self, *args, **kwargs):
+		self._slots = []
+		self._name = None
+
+	def __set_name__(self, owner, name):
+		self._name = "_signal_" + name
+
+	def __get__(self, obj, owner=None):
+		if obj is None:
+			return self
+		if self._name not in obj.__dict__: #Each object gets its own list of connections.
+			obj.__dict__[self._name] = Signal()
+		return obj.__dict__[self._name]
+
+	def connect(self, slot):
+		self._slots.append(slot)
+
+	def emit(self, *args):
+		for slot in list(self._slots):
+			slot(*args)
+
+class QObject:
+	"""
+	Stand-in for `PyQt5.QtCore.QObject`.
+	"""
+
+	def __init__(self, parent=None):
+		self._parent = parent
+
+	def deleteLater(self):
+		pass
+
+def pyqtProperty(property_type, fget=None, fset=None, notify=None, **kwargs):
+	"""
+	Stand-in for `PyQt5.QtCore.pyqtProperty`, as a decorator.
+	"""
+	return lambda getter: property(getter, fset)
+
+def pyqtSlot(*args, **kwargs):
+	"""
+	Stand-in for `PyQt5.QtCore.pyqtSlot`.
+	"""
+	return lambda function: function
+
+class QTimer(QObject):
+	"""
+	Stand-in for `PyQt5.QtCore.QTimer` that never fires.
+	"""
+
+	timeout = Signal()
+
+	def setInterval(self, interval):
+		pass
+
+	def setSingleShot(self, single_shot):
+		pass
+
+	def start(self):
+		pass
+
+	def stop(self):
+		pass
+
+class QFileSystemWatcher(QObject):
+	"""
+	Stand-in for `PyQt5.QtCore.QFileSystemWatcher` that never notices any
+	changes.
+	"""
+
+	directoryChanged = Signal()
+
+	def __init__(self, paths=None, parent=None):
+		super().__init__(parent)
+
+class ListModel(QObject):
+	"""
+	Stand-in for `UM.Qt.ListModel.ListModel`.
+	"""
+
+	def __init__(self, parent=None):
+		super().__init__(parent)
+		self._items = []
+		self._role_names = {}
+
+	def addRoleName(self, role, name):
+		self._role_names[role] = name
+
+	def setItems(self, items):
+		self._items = list(items)
+
+	def insertItem(self, index, item):
+		self._items.insert(index, item)
+
+	def removeItem(self, index):
+		del self._items[index]
+
+	def rowCount(self, parent=None):
+		return len(self._items)
+
+	def data(self, index, role):
+		return self._items[index.row()][self._role_names[role]]
+
+	@property
+	def items(self):
+		return self._items
+
+class Job:
+	"""
+	Stand-in for `UM.Job.Job` that runs as soon as it's started.
+	"""
+
+	progress = Signal()
+	finished = Signal()
+
+	def __init__(self):
+		self._result = None
+
+	def start(self):
+		self.run()
+		self.finished.emit(self)
+
+	def cancel(self):
+		pass
+
+	def setResult(self, result):
+		self._result = result
+
+	def getResult(self):
+		return self._result
+
+class Logger:
+	"""
+	Stand-in for `UM.Logger.Logger` that writes to the standard error stream.
+
+	Warnings and errors are always shown. Other messages are only shown if
+	`verbose` is set, so that the benchmarks can keep them from drowning the
+	measurements.
+	"""
+
+	verbose = True
+	_labels = {"d": "Debug", "i": "Info", "w": "Warning", "e": "Error", "c": "Critical"}
+
+	@staticmethod
+	def log(log_type, message):
+		if Logger.verbose or log_type in ("w", "e", "c"):
+			print("{label}: {message}".format(label=Logger._labels.get(log_type, log_type), message=message), file=sys.stderr)
+
+class Preferences:
+	"""
+	Stand-in for `UM.Preferences.Preferences`.
+	"""
+
+	_values = {}
+
+	@staticmethod
+	def getInstance():
+		return Preferences
+
+	@staticmethod
+	def addPreference(key, default_value):
+		Preferences._values.setdefault(key, default_value)
+
+	@staticmethod
+	def getValue(key):
+		return Preferences._values[key]
+
+	@staticmethod
+	def setValue(key, value):
+		Preferences._values[key] = value
+
+class Resources:
+	"""
+	Stand-in for `UM.Resources.Resources`.
+	"""
+
+	@staticmethod
+	def getDataStoragePath():
+		return data_path
+
+class PluginRegistry:
+	"""
+	Stand-in for `UM.PluginRegistry.PluginRegistry`.
+	"""
+
+	@staticmethod
+	def getInstance():
+		return PluginRegistry
+
+	@staticmethod
+	def getPluginPath(plugin_id):
+		return plugin_path
+
+class Identified:
+	"""
+	Stand-in for a container that only needs to have an ID.
+	"""
+
+	def __init__(self, container_id):
+		self._id = container_id
+
+	def getId(self):
+		return self._id
+
+class ContainerStack:
+	"""
+	Stand-in for the global stack and extruder stacks of Cura.
+	"""
+
+	def __init__(self, definition, variant=None, material=None):
+		self.definition = Identified(definition)
+		self.variant = Identified(variant)
+		self.material = Identified(material)
+
+	def getProperty(self, key, property_name):
+		if property_name == "type":
+			return "float"
+		return None
+
+class MachineManager:
+	"""
+	Stand-in for `cura.Settings.MachineManager.MachineManager`.
+	"""
+
+	activeVariantChanged = Signal()
+	activeMaterialChanged = Signal()
+
+class CuraApplication:
+	"""
+	Stand-in for `cura.CuraApplication.CuraApplication`.
+
+	The active printer, nozzle and material are changed with `configure`.
+	"""
+
+	globalContainerStackChanged = Signal()
+	_instance = None
+
+	def __init__(self):
+		self._machine_manager = MachineManager()
+		self._global_stack = None
+		self._active_extruder = None
+
+	@staticmethod
+	def getInstance():
+		if CuraApplication._instance is None:
+			CuraApplication._instance = CuraApplication()
+		return CuraApplication._instance
+
+	def getMachineManager(self):
+		return self._machine_manager
+
+	def getGlobalContainerStack(self):
+		return self._global_stack
+
+	def configure(self, printer_type, nozzle, material):
+		"""
+		Changes the active printer, nozzle and material, and notifies the
+		plug-in.
+		"""
+		self._global_stack = ContainerStack(printer_type)
+		self._active_extruder = ContainerStack(printer_type + "_extruder", nozzle, material)
+		self.globalContainerStackChanged.emit()
+
+class ExtruderManager:
+	"""
+	Stand-in for `cura.Settings.ExtruderManager.ExtruderManager`.
+	"""
+
+	@staticmethod
+	def getInstance():
+		return ExtruderManager
+
+	@staticmethod
+	def getActiveExtruderStack():
+		return CuraApplication.getInstance()._active_extruder
+
+def _module(name, **attributes):
+	"""
+	Creates a stand-in module and its parents, and installs it.
+	"""
+	parts = name.split(".")
+	for depth in range(1, len(parts) + 1):
+		module_name = ".".join(parts[:depth])
+		if module_name not in sys.modules:
+			sys.modules[module_name] = types.ModuleType(module_name)
+		if depth > 1:
+			setattr(sys.modules[".".join(parts[:depth - 1])], parts[depth - 1], sys.modules[module_name])
+	for key, value in attributes.items():
+		setattr(sys.modules[name], key, value)
+	return sys.modules[name]
+
+def install(data_directory):
+	"""
+	Installs the stand-ins in place of the modules of Uranium, Cura and PyQt.
+	:param data_directory: Where the plug-in must store its data.
+	"""
+	global data_path
+	data_path = data_directory
+	_module("PyQt5.QtCore", QObject=QObject, pyqtSignal=Signal, pyqtProperty=pyqtProperty, pyqtSlot=pyqtSlot, QTimer=QTimer, QFileSystemWatcher=QFileSystemWatcher, Qt=types.SimpleNamespace(UserRole=256))
+	_module("UM.Logger", Logger=Logger)
+	_module("UM.Job", Job=Job)
+	_module("UM.Preferences", Preferences=Preferences)
+	_module("UM.Resources", Resources=Resources)
+	_module("UM.PluginRegistry", PluginRegistry=PluginRegistry)
+	_module("UM.Qt.ListModel", ListModel=ListModel)
+	_module("cura.CuraApplication", CuraApplication=CuraApplication)
+	_module("cura.Settings.ExtruderManager", ExtruderManager=ExtruderManager)
+	_module("cura.Settings.MachineManager", MachineManager=MachineManager)
+
+def load_plugin(module_name):
+	"""
+	Loads a module of the plug-in.
+
+	The plug-in is loaded as the package `R2D2` without running its
+	`__init__`, since that registers the plug-in with Cura.
+	:param module_name: The module to load, for instance `"Prints"`.
+	:return: The module.
+	"""
+	if "R2D2" not in sys.modules:
+		package = types.ModuleType("R2D2")
+		package.__path__ = [plugin_path]
+		sys.modules["R2D2"] = package
+	return importlib.import_module("R2D2." + module_name)
+
+def reset():
+	"""
+	Forgets all singletons of the plug-in, as if Cura was restarted.
+	"""
+	for module_name, class_name in (("Prints", "Prints"), ("PrintStore", "PrintStore"), ("ModelStore", "ModelStore"), ("Baselines", "Baselines")):
+		setattr(getattr(load_plugin(module_name), class_name), "inst", None)
+	load_plugin("DesignMatrix").DesignMatrix._cache.clear()
\ No newline at end of file
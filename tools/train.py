@@ -0,0 +1,135 @@
+#Plug-in to gather after-print feedback to tune your profiles, optimising for certain intent.
+#Copyright (C) 2018 Ghostkeeper
+
+"""
+Trains models without Cura, for instance on a server with a large corpus of
+prints.
+
+First export the prints of a Cura data directory as datasets, one for each
+combination of printer type, nozzle and material:
+
+`python tools/train.py export <data directory> <datasets directory>`
+
+The data directory is only read.
+
+Then train a dataset:
+
+`python tools/train.py train <dataset directory> <models directory>`
+
+This writes the model as an `.npz` file to the models directory. Settings that
+were trained on the same data before are not trained again. The model can be
+imported in the plug-in with `Prints.import_model`, or by copying it to the
+`r2d2_models` directory in the data directory of Cura.
+"""
+
+import argparse #To parse the command line.
+import os #To find the prints.
+import re #To name the dataset directories.
+import shutil #To clean up the scratch directory.
+import sys #To report errors.
+import tempfile #To give the plug-in a scratch directory while exporting.
+import time #To report how long training took.
+
+import headless #To run the plug-in without Cura.
+
+def export(data_directory, datasets_directory, store):
+	"""
+	Exports all prints of a data directory as datasets.
+	:param data_directory: The data directory of Cura with the prints.
+	:param datasets_directory: The directory to create a dataset directory in
+	for each partition.
+	:param store: Which print store the prints are in, `json` or `sqlite`.
+	"""
+	if store == "sqlite":
+		source = os.path.join(data_directory, "print_evaluations.db")
+		exists = os.path.isfile(source)
+	else:
+		source = os.path.join(data_directory, "print_evaluations")
+		exists = os.path.isdir(source)
+	if not exists: #The print stores would create it.
+		print("There are no prints in {source}.".format(source=source), file=sys.stderr)
+		sys.exit(1)
+
+	scratch_directory = tempfile.mkdtemp(prefix="r2d2_export_")
+	try:
+		headless.install(scratch_directory) #Whatever the plug-in stores goes to the scratch directory, so the data directory of Cura is only read.
+		Baselines = headless.load_plugin("Baselines")
+		Dataset = headless.load_plugin("Dataset")
+		JsonPrintStore = headless.load_plugin("JsonPrintStore")
+		SqlitePrintStore = headless.load_plugin("SqlitePrintStore")
+
+		Baselines.Baselines.get_instance().import_from(os.path.join(data_directory, "r2d2_baselines")) #To be able to read the settings of the prints.
+		if store == "sqlite":
+			prints = SqlitePrintStore.SqlitePrintStore(source).load_all()
+		else:
+			prints = JsonPrintStore.JsonPrintStore(source).load_all() #Without an index, which would be written to the data directory.
+
+		partitions = {}
+		for prnt in prints:
+			partitions.setdefault((prnt.printer_type, prnt.evaluated_nozzle(), prnt.evaluated_material()), []).append(prnt)
+		for partition, partition_prints in sorted(partitions.items()):
+			directory = os.path.join(datasets_directory, re.sub(r"[^A-Za-z0-9.-]+", "_", "_".join(partition)))
+			Dataset.Dataset.from_prints(partition_prints, partition).save(directory)
+			print("Exported {num_prints} prints of {partition} to {directory}.".format(num_prints=len(partition_prints), partition=" / ".join(partition), directory=directory))
+	finally:
+		shutil.rmtree(scratch_directory, ignore_errors=True)
+
+def train(dataset_directory, models_directory, highest_exponent, cross_terms, seed):
+	"""
+	Trains the model of a dataset.
+	:param dataset_directory: The directory that the dataset was exported to.
+	:param models_directory: The directory to store the model in.
+	:param highest_exponent: How complex of a polynomial to fit for each
+	setting.
+	:param cross_terms: Whether to model interactions between evaluation
+	entries.
+	:param seed: Seed for choosing the bags, or `None` to choose randomly.
+	"""
+	headless.install(models_directory)
+	Dataset = headless.load_plugin("Dataset")
+	ModelStore = headless.load_plugin("ModelStore")
+	TrainJob = headless.load_plugin("TrainJob")
+
+	dataset = Dataset.Dataset.load(dataset_directory)
+	if dataset.partition is None:
+		print("The dataset doesn't belong to a printer, nozzle and material.", file=sys.stderr)
+		sys.exit(1)
+	models = ModelStore.ModelStore(models_directory)
+	job = TrainJob.TrainJob(dataset, models.fingerprints(dataset.partition))
+	job.highest_exponent = highest_exponent
+	job.cross_terms = cross_terms
+	job.seed = seed
+	job.progress.connect(lambda _, progress: print("\r{progress:.0f}%".format(progress=progress), end="", flush=True))
+	start = time.perf_counter()
+	job.start() #The stand-in of jobs runs right away.
+	print()
+	models.store(dataset.partition, job.evaluation_keys, job.highest_exponent, job.cross_terms, job.getResult(), job.fingerprints, job.options, job.errors)
+	print("Trained {num_settings} settings of {num_prints} prints in {seconds:.1f}s.".format(num_settings=len(job.getResult()), num_prints=len(dataset), seconds=time.perf_counter() - start))
+
+def main():
+	"""
+	Runs the command that was given on the command line.
+	"""
+	parser = argparse.ArgumentParser(description="Train R2D2 models without Cura.")
+	commands = parser.add_subparsers(dest="command")
+	export_parser = commands.add_parser("export", help="Export the prints of a Cura data directory as datasets.")
+	export_parser.add_argument("data_directory", help="The data directory of Cura.")
+	export_parser.add_argument("datasets_directory", help="Where to export the datasets to.")
+	export_parser.add_argument("--store", choices=["json", "sqlite"], default="json", help="The print store that the prints are in.")
+	train_parser = commands.add_parser("train", help="Train the model of a dataset.")
+	train_parser.add_argument("dataset_directory", help="The directory of the dataset.")
+	train_parser.add_argument("models_directory", help="Where to store the model.")
+	train_parser.add_argument("--highest-exponent", type=int, default=4, help="How complex of a polynomial to fit for each setting.")
+	train_parser.add_argument("--cross-terms", action="store_true", help="Model interactions between evaluation entries.")
+	train_parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible training.")
+	arguments = parser.parse_args()
+
+	if arguments.command == "export":
+		export(arguments.data_directory, arguments.datasets_directory, arguments.store)
+	elif arguments.command == "train":
+		train(arguments.dataset_directory, arguments.models_directory, arguments.highest_exponent, arguments.cross_terms, arguments.seed)
+	else:
+		parser.print_help()
+
+if __name__ == "__main__":
+	main()
\ No newline at end of file